@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# benchmarks/generate.py
+"""
+Synthetic OpenF1-shaped data for benchmarks.
+
+Scale 1 is roughly one season: 24 meetings, five sessions each, a 20-car
+grid. Scale N has N times as many meetings, so every per-meeting endpoint
+grows linearly. Output is deterministic for a given scale and seed.
+
+    python benchmarks/generate.py --scale 10 --out /tmp/raw   # raw-zone layout
+"""
+
+import os
+import json
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+# ─── CONFIG ───
+YEAR                = 2025
+MEETINGS_PER_SEASON = 24
+DRIVERS_PER_SESSION = 20
+FIRST_MEETING_KEY   = 1000
+FIRST_SESSION_KEY   = 10000
+
+SESSIONS = [
+    ("Practice", "Practice 1", 60),
+    ("Practice", "Practice 2", 60),
+    ("Practice", "Practice 3", 60),
+    ("Qualifying", "Qualifying", 60),
+    ("Race", "Race", 120),
+]
+POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]   # race points for the top ten
+TEAMS = ["Red Bull Racing", "Ferrari", "Mercedes", "McLaren", "Aston Martin",
+         "Alpine", "Williams", "Racing Bulls", "Kick Sauber", "Haas F1 Team"]
+CIRCUITS = [(63, "Sakhir", "BRN", "Bahrain"), (149, "Jeddah", "KSA", "Saudi Arabia"),
+            (10, "Melbourne", "AUS", "Australia"), (46, "Suzuka", "JPN", "Japan"),
+            (151, "Miami", "USA", "United States"), (22, "Monte Carlo", "MON", "Monaco"),
+            (2, "Silverstone", "GBR", "United Kingdom"), (39, "Monza", "ITA", "Italy")]
+
+
+def iso(ts: datetime) -> str:
+    return ts.isoformat()
+
+
+def generate(scale: int = 1, seed: int = 0) -> Dict[str, List[Dict]]:
+    """Records per OpenF1 endpoint: meetings, sessions, drivers, session_result, starting_grid."""
+    rng = random.Random(seed)
+    data: Dict[str, List[Dict]] = {
+        "meetings": [], "sessions": [], "drivers": [], "session_result": [], "starting_grid": [],
+    }
+    roster = [
+        {"driver_number": n, "first_name": f"Driver{n}", "last_name": f"Number{n}",
+         "team_name": TEAMS[i // 2]}
+        for i, n in enumerate(rng.sample(range(1, 100), DRIVERS_PER_SESSION))
+    ]
+    start = datetime(YEAR, 1, 3, 10, tzinfo=timezone.utc)
+    # Meetings are packed closer together as the scale grows so they all fit in the year
+    spacing = timedelta(minutes=max(60, 15 * 24 * 60 // max(1, scale)))
+    session_key = FIRST_SESSION_KEY
+
+    for m in range(MEETINGS_PER_SEASON * scale):
+        mk = FIRST_MEETING_KEY + m
+        circuit_key, location, code, country = CIRCUITS[m % len(CIRCUITS)]
+        day = start + m * spacing
+        place = {"location": location, "country_key": circuit_key, "country_code": code,
+                 "country_name": country, "circuit_key": circuit_key,
+                 "circuit_short_name": location, "gmt_offset": "00:00:00", "year": YEAR}
+        data["meetings"].append({
+            "meeting_key": mk, "meeting_code": code,
+            "meeting_name": f"{country} Grand Prix {m}",
+            "meeting_official_name": f"FORMULA 1 {country.upper()} GRAND PRIX {YEAR} #{m}",
+            "date_start": iso(day), **place,
+        })
+
+        for s, (session_type, session_name, minutes) in enumerate(SESSIONS):
+            sk = session_key
+            session_key += 1
+            begin = day + timedelta(minutes=s * 10)
+            data["sessions"].append({
+                "meeting_key": mk, "session_key": sk, "session_type": session_type,
+                "session_name": session_name, "date_start": iso(begin),
+                "date_end": iso(begin + timedelta(minutes=minutes)), **place,
+            })
+            order = rng.sample(roster, len(roster))
+            for pos, driver in enumerate(order, 1):
+                data["drivers"].append({
+                    "meeting_key": mk, "session_key": sk,
+                    "full_name": f"{driver['first_name']} {driver['last_name'].upper()}",
+                    "name_acronym": driver["last_name"][:3].upper(), **driver,
+                })
+                dnf = session_type == "Race" and rng.random() < 0.05
+                data["session_result"].append({
+                    "meeting_key": mk, "session_key": sk, "driver_number": driver["driver_number"],
+                    "position": None if dnf else pos, "number_of_laps": rng.randint(20, 60),
+                    "points": (POINTS[pos - 1] if session_type == "Race" and not dnf
+                               and pos <= len(POINTS) else 0),
+                    "dnf": dnf, "dns": False, "dsq": False,
+                    "duration": round(rng.uniform(60, 95), 3), "gap_to_leader": pos - 1,
+                })
+                if session_type == "Qualifying":
+                    # Like OpenF1, the grid carries the qualifying session's key
+                    data["starting_grid"].append({
+                        "meeting_key": mk, "session_key": sk,
+                        "driver_number": driver["driver_number"], "position": pos,
+                        "lap_duration": round(rng.uniform(70, 95), 3),
+                    })
+    return data
+
+
+def write_raw_zone(data: Dict[str, List[Dict]], out: str):
+    """Write ``data`` in the layout Extract.py lands (JSON)."""
+    def dump(rel: str, records: List[Dict]):
+        path = os.path.join(out, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(records, f)
+
+    def group(records: List[Dict], *keys: str) -> Dict:
+        out: Dict = {}
+        for rec in records:
+            out.setdefault(tuple(rec[k] for k in keys), []).append(rec)
+        return out
+
+    dump(f"meetings/meetings_{YEAR}.json", data["meetings"])
+    for (mk,), recs in group(data["sessions"], "meeting_key").items():
+        dump(f"sessions/{mk}_sessions.json", recs)
+    for (mk,), recs in group(data["drivers"], "meeting_key").items():
+        dump(f"drivers/{mk}.json", recs)
+    for (mk, sk), recs in group(data["session_result"], "meeting_key", "session_key").items():
+        dump(f"session_results/{mk}_{sk}.json", recs)
+    for (mk,), recs in group(data["starting_grid"], "meeting_key").items():
+        dump(f"starting_grids/{mk}_starting_grid.json", recs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic OpenF1 raw data")
+    parser.add_argument("--scale", type=int, default=1, help="multiple of one season")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="directory for the raw-zone layout")
+    args = parser.parse_args()
+
+    data = generate(args.scale, args.seed)
+    write_raw_zone(data, args.out)
+    print(json.dumps({name: len(records) for name, records in data.items()}))
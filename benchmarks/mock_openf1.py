@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# benchmarks/mock_openf1.py
+"""
+Local stand-in for the OpenF1 REST API, serving generate.py data.
+
+Query parameters filter records by equality (``?meeting_key=1000``), ETags
+are honoured with 304s, and every Nth request can be answered with a 429 to
+exercise the extractor's back-off. Request counts are kept per endpoint.
+"""
+
+import json
+import hashlib
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+
+def _coerce(value: str):
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+class MockOpenF1:
+    def __init__(self, data: Dict[str, List[Dict]], throttle_every: int = 0):
+        self.data = data
+        self.throttle_every = throttle_every
+        self.requests: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self.records_served = 0
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+        self._index: Dict[Tuple[str, str], Dict] = {}
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _lookup(self, endpoint: str, params: Dict) -> List[Dict]:
+        # One equality index per (endpoint, parameter), built on first use
+        if len(params) == 1:
+            (name, value), = params.items()
+            with self._lock:
+                index = self._index.get((endpoint, name))
+                if index is None:
+                    index = {}
+                    for rec in self.data[endpoint]:
+                        index.setdefault(rec.get(name), []).append(rec)
+                    self._index[(endpoint, name)] = index
+            return index.get(value, [])
+        return [rec for rec in self.data[endpoint]
+                if all(rec.get(k) == v for k, v in params.items())]
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status: int, body: bytes = b"", headers: Dict = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with mock._lock:
+                    mock.statuses[status] += 1
+                    mock.bytes_served += len(body)
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+                with mock._lock:
+                    mock.requests[endpoint] += 1
+                    n = sum(mock.requests.values())
+                if endpoint not in mock.data:
+                    return self.reply(404)
+                if mock.throttle_every and n % mock.throttle_every == 0:
+                    return self.reply(429, headers={"Retry-After": "0.1"})
+
+                params = {k: _coerce(v) for k, v in parse_qsl(url.query)}
+                records = mock._lookup(endpoint, params)
+                body = json.dumps(records).encode()
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    return self.reply(304, headers={"ETag": etag})
+                with mock._lock:
+                    mock.records_served += len(records)
+                self.reply(200, body, {"Content-Type": "application/json", "ETag": etag})
+
+        return Handler
+
+    def start(self) -> "MockOpenF1":
+        threading.Thread(target=self.server.serve_forever, name="mock-openf1", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "statuses": {str(k): v for k, v in self.statuses.items()},
+                "records": self.records_served,
+                "bytes": self.bytes_served,
+            }
+
+    def reset_counts(self):
+        with self._lock:
+            self.requests.clear()
+            self.statuses.clear()
+            self.records_served = self.bytes_served = 0
@@ -1,6 +1,27 @@
+import sys
+import functools
 from datetime import datetime, timedelta
 from airflow import DAG
-from airflow.operators.bash import BashOperator
+from airflow.decorators import task, task_group
+from airflow.operators.python import get_current_context
+
+# Pipeline modules are imported inside the tasks, so parsing this file stays
+# cheap; within a worker process their S3 clients and engines are reused.
+SCRIPTS = '/opt/airflow/scripts'
+if SCRIPTS not in sys.path:
+    sys.path.append(SCRIPTS)
+
+# Extract tasks draw from this pool (created by airflow-init in docker-compose.yml).
+# At most OPENF1_POOL_SLOTS run at once and each gets an equal share of the
+# OpenF1 rate budget, so the DAG as a whole never exceeds OPENF1_RATE_LIMIT.
+OPENF1_POOL       = 'openf1_api'
+OPENF1_POOL_SLOTS = 3
+OPENF1_RATE_LIMIT = 3   # requests per second
+TASK_RATE_LIMIT   = OPENF1_RATE_LIMIT / OPENF1_POOL_SLOTS
+
+# Tasks run from /opt/airflow, so the scripts' relative local_data paths and
+# this one all point at the mounted volume
+PROCESSED_ROOT = '/opt/airflow/local_data/processed'
 
 default_args = {
     'owner': 'Teja',
@@ -8,6 +29,30 @@ default_args = {
     'retry_delay': timedelta(minutes=2),
 }
 
+
+def run_id() -> str:
+    return get_current_context()['run_id']
+
+
+def flushes_metrics(fn):
+    """Write the task's metrics textfile after it runs, even on failure."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        import metrics
+        ti = get_current_context()['ti']
+        # One file per task (and mapped meeting), overwritten by its next run,
+        # so the directory never grows; it holds only this run's series.
+        job = f'airflow_{ti.dag_id}_{ti.task_id}'
+        if ti.map_index >= 0:
+            job += f'_{ti.map_index}'
+        metrics.reset()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            metrics.flush(job)
+    return wrapper
+
+
 with DAG(
     dag_id='f1_etl_pipeline',
     description='Full F1 ETL DAG with all stages',
@@ -17,41 +62,63 @@ with DAG(
     catchup=False
 ) as dag:
 
-    extract_data = BashOperator(
-        task_id='extract_data',
-        bash_command='python /opt/airflow/scripts/Extract.py'
-    )
-
-    transform_drivers = BashOperator(
-        task_id='transform_drivers',
-        bash_command='python /opt/airflow/scripts/drivers_transform.py'
-    )
-
-    transform_meetings = BashOperator(
-        task_id='transform_meetings',
-        bash_command='python /opt/airflow/scripts/meetings_transform.py'
-    )
-
-    transform_sessionresults = BashOperator(
-        task_id='transform_sessionresults',
-        bash_command='python /opt/airflow/scripts/sessionresults_transform.py'
-    )
-
-    transform_sessions = BashOperator(
-        task_id='transform_sessions',
-        bash_command='python /opt/airflow/scripts/sessions_transform.py'
-    )
-
-    transform_startinggrid = BashOperator(
-        task_id='transform_startinggrid',
-        bash_command='python /opt/airflow/scripts/startinggrid_transform.py'
-    )
-
-    load_data = BashOperator(
-        task_id='load_data',
-        bash_command='python /opt/airflow/scripts/load.py'
-    )
+    @task(pool=OPENF1_POOL)
+    @flushes_metrics
+    def extract_meetings() -> list:
+        import Extract
+        Extract.set_rate_limit(TASK_RATE_LIMIT, 1)
+        return Extract.land_meetings()
+
+    @task
+    @flushes_metrics
+    def transform_meetings():
+        import transform
+        transform.run(['meetings'], export_mode='snapshot', run_id=run_id())
+
+    # Expanded once per meeting: a failed meeting retries on its own, and the
+    # Celery workers pick up meetings in parallel.
+    @task_group
+    def meeting_etl(meeting_key: int):
+
+        @task(pool=OPENF1_POOL)
+        @flushes_metrics
+        def extract_meeting(mk: int):
+            import Extract
+            Extract.set_rate_limit(TASK_RATE_LIMIT, 1)
+            Extract.extract_meeting_keys([mk])
+
+        # Snapshot partitions are per meeting, so concurrent meetings never
+        # write the same file; the season's delta is exported once below.
+        @task
+        @flushes_metrics
+        def transform_meeting(mk: int):
+            import transform
+            names = [name for name, spec in transform.ENTITIES.items() if spec.per_meeting]
+            transform.run(names, meeting_key=mk, export_mode='snapshot', run_id=run_id())
+
+        @task
+        @flushes_metrics
+        def load_meeting(mk: int):
+            import load
+            # Same database transform_meeting wrote: the run id says what changed
+            load.load_all(PROCESSED_ROOT, meeting_key=mk, run_id=run_id())
+
+        extract_meeting(meeting_key) >> transform_meeting(meeting_key) >> load_meeting(meeting_key)
+
+    @task
+    @flushes_metrics
+    def export_deltas():
+        import export
+        export.export_run(mode='delta', run_id=run_id())
+
+    @task
+    @flushes_metrics
+    def advance_watermark():
+        import Extract
+        Extract.advance_season_watermark()
+
+    meeting_keys = extract_meetings()
+    meetings = meeting_etl.expand(meeting_key=meeting_keys)
 
     # Define dependencies
-    extract_data >> [transform_drivers, transform_meetings, transform_sessionresults, transform_sessions, transform_startinggrid]
-    [transform_drivers, transform_meetings, transform_sessionresults, transform_sessions, transform_startinggrid] >> load_data
\ No newline at end of file
+    meeting_keys >> transform_meetings() >> meetings >> [export_deltas(), advance_watermark()]
@@ -9,23 +9,23 @@ case "${1:-}" in
     ;;
   transform_meetings)
     echo "🔄  Transforming meetings…"
-    python scripts/meetings_transform.py
+    python scripts/transform.py meetings
     ;;
   transform_sessions)
     echo "🔄  Transforming sessions…"
-    python scripts/sessions_transform.py
+    python scripts/transform.py sessions
     ;;
   transform_drivers)
     echo "🔄  Transforming drivers…"
-    python scripts/drivers_transform.py
+    python scripts/transform.py drivers
     ;;
   transform_results)
     echo "🔄  Transforming session results…"
-    python scripts/sessionresults_transform.py
+    python scripts/transform.py session_results
     ;;
   transform_grid)
     echo "🔄  Transforming starting grid…"
-    python scripts/startinggrid_transform.py
+    python scripts/transform.py starting_grids
     ;;
   load)
     echo "🔄  Loading extracted data"
@@ -34,11 +34,7 @@ case "${1:-}" in
   all)
     echo "🚀  Running full ETL: extract + all transforms"
     python scripts/Extract.py
-    python scripts/meetings_transform.py
-    python scripts/sessions_transform.py
-    python scripts/drivers_transform.py
-    python scripts/sessionresults_transform.py
-    python scripts/startinggrid_transform.py
+    python scripts/transform.py
     python scripts/load.py
     ;;
   *)
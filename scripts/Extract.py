@@ -2,160 +2,813 @@
 """
 scripts/extract.py
 
-Fetches OpenF1 data for 2025:
+Fetches one OpenF1 season (OPENF1_SEASON or --season, default 2025):
   - meetings
-  - drivers
+  - drivers (partitioned by meeting)
   - sessions
   - session_result (saved as meeting_key_session_key)
   - starting_grid (by meeting)
 
-Saves raw JSON under local_data/raw/{endpoint}/ and uploads to S3.
+Saves raw JSON under local_data/raw/{endpoint}/ and uploads to S3, or lands it
+wherever RAW_STORAGE points (storage.py: s3, local, memory or local+s3).
+
+RAW_FORMAT=ndjson.gz / ndjson.zst lands compressed NDJSON instead, encoded into
+a spooled buffer and streamed to S3 (multipart above RAW_MULTIPART_BYTES);
+RAW_KEEP_LOCAL=0 skips the local copy. Digests of landed payloads are kept in
+local_data/state/raw_landed.json so unchanged data is never re-uploaded;
+concurrent per-meeting runs share it, each merging in only the keys it wrote.
+
+Uploads run in the background on RAW_UPLOAD_WORKERS threads of their own, so
+fetching carries on while earlier payloads drain; at most RAW_UPLOAD_QUEUE
+encoded payloads wait at once. Each upload is retried RAW_UPLOAD_RETRIES
+times and every entry point flushes the queue once at the end, reporting
+what still failed (RAW_UPLOAD_WORKERS=0 uploads inline).
+
+Responses are kept in an on-disk conditional-GET cache (local_data/cache/http)
+so unchanged endpoints are neither rewritten locally nor re-uploaded to S3.
+
+Requests run on a bounded worker pool (EXTRACT_WORKERS) and every call draws
+from one shared token bucket sized to the OpenF1 rate budget, so throughput is
+set by the rate limit rather than by round-trip latency.
+
+With --mode incremental only sessions newer than the season's persisted
+watermark (local_data/state/extract_watermark_{season}.json), or not landed
+yet, are fetched. Per-meeting raw keys are named by meeting_key, which OpenF1
+never reuses across seasons; backfill.py drives several seasons at once.
+
+The steps are importable (extract_season, land_meetings, extract_meeting_keys,
+advance_season_watermark) for in-process Airflow tasks; the raw store and its
+S3 client are created on first use. Request latency, 429s, bytes and step timings are
+recorded in metrics.py.
 """
 
 import os
-import boto3
 import time
 import json
+import fcntl
+import hashlib
+import argparse
+import tempfile
+import contextvars
+import threading
 import requests
-from typing import Dict, List, Tuple
+from boto3.s3.transfer import TransferConfig
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import metrics
+from json_stream import iter_json_records
+from raw_format import FORMATS, RAW_FORMAT, check_format, encode, extension, open_decoded
+from storage import RAW_STORAGE, open_storage
 
 # ─── Configuration ──────────────────────────────────────────────────────────────
-BASE_URL       = "https://api.openf1.org/v1"
-YEAR           = 2025
+BASE_URL       = os.getenv("OPENF1_BASE_URL", "https://api.openf1.org/v1")
+YEAR           = int(os.getenv("OPENF1_SEASON", "2025"))   # default season
 RAW_ROOT       = os.path.join("local_data", "raw")
 RETRY_COUNT    = 3
 RETRY_WAIT     = 3     # seconds if no Retry-After header
-THROTTLE_PAUSE = 0.5   # seconds between every request
+RATE_LIMIT     = float(os.getenv("OPENF1_RATE_LIMIT", "3"))  # requests per second
+RATE_BURST     = int(os.getenv("OPENF1_RATE_BURST", "3"))
+MAX_WORKERS    = int(os.getenv("EXTRACT_WORKERS", "4"))      # 1 = sequential
+
+# HTTP response cache
+CACHE_ROOT      = os.getenv("HTTP_CACHE_DIR", os.path.join("local_data", "cache", "http"))
+CACHE_TTL       = int(os.getenv("HTTP_CACHE_TTL", "3600"))   # seconds served without revalidation
+CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Incremental extraction
+STATE_ROOT      = os.path.join("local_data", "state")
+WATERMARK_PATH  = os.path.join(STATE_ROOT, "extract_watermark.json")  # before per-season files
+EXTRACT_MODE    = os.getenv("EXTRACT_MODE", "full")          # full | incremental
+SETTLE_HOURS    = float(os.getenv("EXTRACT_SETTLE_HOURS", "6"))  # results may still change
+
+# Raw landing
+RAW_EXT         = extension(check_format(RAW_FORMAT))
+SPOOL_BYTES     = int(os.getenv("RAW_SPOOL_BYTES", str(8 * 1024 * 1024)))      # then spill to disk
+MULTIPART_BYTES = int(os.getenv("RAW_MULTIPART_BYTES", str(8 * 1024 * 1024)))
+LANDED_PATH     = os.path.join(STATE_ROOT, "raw_landed.json")
+UPLOAD_WORKERS  = int(os.getenv("RAW_UPLOAD_WORKERS", "8"))    # 0 = upload inline
+UPLOAD_QUEUE    = int(os.getenv("RAW_UPLOAD_QUEUE", str(max(1, UPLOAD_WORKERS) * 2)))
+UPLOAD_RETRIES  = int(os.getenv("RAW_UPLOAD_RETRIES", "3"))
+
+# Fetch session_result once per meeting and split locally (0 = one call per session)
+BATCH_RESULTS   = os.getenv("EXTRACT_BATCH_RESULTS", "1") == "1"
 
 # S3 configuration
 RAW_BUCKET = os.getenv("RAW_BUCKET", "etl-f1-data")
-s3 = boto3.client("s3")
+transfer_config = TransferConfig(multipart_threshold=MULTIPART_BYTES,
+                                  multipart_chunksize=MULTIPART_BYTES)
+
+# ─── Rate Limiting ──────────────────────────────────────────────────────────────
+class TokenBucket:
+    """Thread-safe token bucket shared by every in-flight request.
+
+    ``pause`` empties the bucket and blocks all callers until the deadline, so
+    a 429 backs off the whole pool instead of a single worker.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    elapsed = now - self.updated
+                    self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def configure(self, rate: float, burst: int):
+        with self.lock:
+            self.rate = rate
+            self.capacity = max(1, burst)
+            self.tokens = min(self.tokens, float(self.capacity))
+
+    def pause(self, seconds: float):
+        with self.lock:
+            until = time.monotonic() + seconds
+            if until > self.paused_until:
+                self.paused_until = until
+                self.tokens = 0.0
+                self.updated = until
+
+
+limiter = TokenBucket(RATE_LIMIT, RATE_BURST)
+
+# Set to a list to collect the requests given up on without any cached body
+# (see backfill.py); run_parallel carries it into its worker threads.
+failed_requests: contextvars.ContextVar = contextvars.ContextVar("failed_requests", default=None)
+
+
+def collecting_failures(fresh: bool = False) -> List[str]:
+    """The list this context's failed requests go to; a new one unless a caller
+    (e.g. a backfill partition) already collects them.
+
+    ``fresh`` always starts a new list: pool threads are reused, so a backfill
+    partition must not inherit an earlier partition's failures.
+    """
+    failed = None if fresh else failed_requests.get()
+    if failed is None:
+        failed = []
+        failed_requests.set(failed)
+    return failed
+
+# ─── Response Cache ─────────────────────────────────────────────────────────────
+_cache_lock = threading.Lock()
+
+
+def cache_path(endpoint: str, params: Dict = None) -> str:
+    key = json.dumps([endpoint, params or {}], sort_keys=True)
+    return os.path.join(CACHE_ROOT, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+
+def load_cache(path: str) -> Optional[Dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+        os.utime(path)  # mark as recently used for eviction
+    except (OSError, ValueError):
+        # Includes an entry evicted by another worker between the read and the touch
+        return None
+    return entry
+
+
+# Bytes in CACHE_ROOT as of the last scan plus this process's writes since;
+# None until the first write scans the directory
+_cache_bytes: Optional[int] = None
+
+
+def file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def store_cache(path: str, entry: Dict):
+    global _cache_bytes
+    ensure_dir(CACHE_ROOT)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False)
+    added = os.path.getsize(tmp) - file_size(path)
+    os.replace(tmp, path)
+    with _cache_lock:
+        if _cache_bytes is not None:
+            _cache_bytes += added
+        over = _cache_bytes is None or _cache_bytes > CACHE_MAX_BYTES
+    if over:
+        evict_cache()
+
+
+def evict_cache():
+    """Drop least-recently-used entries until the cache fits CACHE_MAX_BYTES.
+
+    Only runs when the running total says the cache may be over the limit,
+    and resets that total from the directory it scanned.
+    """
+    global _cache_bytes
+    with _cache_lock:
+        entries = []
+        for name in os.listdir(CACHE_ROOT):
+            if not name.endswith(".json"):
+                continue
+            try:
+                st = os.stat(os.path.join(CACHE_ROOT, name))
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= CACHE_MAX_BYTES:
+                break
+            try:
+                os.remove(os.path.join(CACHE_ROOT, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+        _cache_bytes = total
 
 # ─── Helper Functions ────────────────────────────────────────────────────────────
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
 
 
-def fetch_json(endpoint: str, params: Dict = None) -> Dict:
+def run_parallel(fn: Callable, items: Iterable) -> List:
+    """Map ``fn`` over ``items`` on the worker pool, preserving input order."""
+    items = list(items)
+    if MAX_WORKERS <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+        return [future.result() for future in futures]
+
+
+def fetch_json(endpoint: str, params: Dict = None) -> Tuple[Optional[Any], bool]:
+    """Return ``(data, changed)`` for an endpoint.
+
+    ``changed`` is False when the response came from a fresh cache entry, a
+    304 revalidation, or a 200 whose body matches the cached one. ``data`` is
+    None when every attempt failed and nothing was cached; the request is then
+    recorded in ``failed_requests``.
+    """
     url = f"{BASE_URL}/{endpoint}"
+    path = cache_path(endpoint, params)
+    cached = load_cache(path)
+    if cached is not None and time.time() - cached["fetched_at"] < CACHE_TTL:
+        return cached["body"], False
+
+    headers = {}
+    if cached is not None:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
     for attempt in range(1, RETRY_COUNT + 1):
+        limiter.acquire()
+        started = time.perf_counter()
         try:
-            resp = requests.get(url, params=params or {}, timeout=10)
+            resp = requests.get(url, params=params or {}, headers=headers, timeout=10)
+            metrics.observe("http_request_seconds", time.perf_counter() - started,
+                            endpoint=endpoint, status=resp.status_code)
+            metrics.inc("bytes_total", len(resp.content), source="openf1", direction="in")
             if resp.status_code == 429:
+                metrics.inc("http_throttled_total", endpoint=endpoint)
                 ra = resp.headers.get("Retry-After")
                 wait = float(ra) if ra is not None else RETRY_WAIT
-                print(f"⏳  [{endpoint}] rate limited; retry after {wait:.1f}s")
-                time.sleep(wait)
+                print(f"⏳  [{endpoint}] rate limited; pausing all requests for {wait:.1f}s")
+                limiter.pause(wait)
                 continue
+            if resp.status_code == 304 and cached is not None:
+                cached["fetched_at"] = time.time()
+                store_cache(path, cached)
+                return cached["body"], False
             resp.raise_for_status()
-            return resp.json()
+            body = resp.json()
+            store_cache(path, {
+                "fetched_at":    time.time(),
+                "etag":          resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "body":          body,
+            })
+            return body, cached is None or cached["body"] != body
         except Exception as e:
             print(f"⚠️  [{endpoint}] attempt {attempt} failed: {e}")
             if attempt < RETRY_COUNT:
                 time.sleep(RETRY_WAIT)
             else:
                 print(f"❌  [{endpoint}] giving up after {RETRY_COUNT} attempts")
-                return {}
-    return {}
+                break
+    if cached is not None:
+        return cached["body"], False
+    failed = failed_requests.get()
+    if failed is not None:
+        failed.append(f"{endpoint} {params or {}}")
+    return None, False
 
 
 def save_json(data: Dict, path: str):
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
+# ─── Raw Landing ────────────────────────────────────────────────────────────────
+def raw_storage():
+    return open_storage(RAW_STORAGE, bucket=RAW_BUCKET, root=RAW_ROOT,
+                        pool=max(10, MAX_WORKERS + UPLOAD_WORKERS), transfer=transfer_config)
+
+_landed: Dict[str, str] = {}   # raw key -> digest of the payload last landed there
+UNLANDED = ""                   # digest of a key whose last upload failed; lands again
+_dirty: Set[str] = set()        # keys this process set since the last save_landed
+_landed_lock = threading.Lock()
+
+
+def raw_key(prefix: str, name: str) -> str:
+    return f"{prefix}/{name}{RAW_EXT}"
+
+
+def digest(data: Any) -> str:
+    return hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def load_landed():
+    """Add the index's keys to ``_landed``; keys already set in this process (by
+    concurrent backfill partitions, say) are newer and kept."""
+    try:
+        with open(LANDED_PATH, encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return
+    with _landed_lock:
+        for key, key_digest in saved.items():
+            _landed.setdefault(key, key_digest)
+
+
+def mark_landed(key: str, key_digest: str):
+    with _landed_lock:
+        _landed[key] = key_digest
+        _dirty.add(key)
+
+
+@contextmanager
+def index_file_lock() -> Iterator[None]:
+    """Exclusive across processes, for the index's read-modify-write."""
+    ensure_dir(STATE_ROOT)
+    with open(f"{LANDED_PATH}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def save_landed():
+    """Merge the keys this process set into the index; per-meeting runs share the
+    file, and the rest of ``_landed`` may be older than what they wrote."""
+    with _landed_lock, index_file_lock():
+        if not _dirty:
+            return
+        try:
+            with open(LANDED_PATH, encoding="utf-8") as f:
+                merged = json.load(f)
+        except (OSError, ValueError):
+            merged = {}
+        merged.update({key: _landed[key] for key in _dirty})
+        tmp = f"{LANDED_PATH}.{os.getpid()}.tmp"
+        save_json(merged, tmp)
+        os.replace(tmp, LANDED_PATH)
+        _dirty.clear()
+
+
+def has_copy(key: str) -> bool:
+    """Whether the raw store has ``key`` where checking costs no request."""
+    store = raw_storage()
+    return store.local and store.exists(key)
 
-def upload_to_s3(local_path: str, s3_key: str):
+
+def is_landed(key: str) -> bool:
+    # An older copy of a key whose upload failed must not pass for the new payload
+    if key in _landed:
+        return _landed[key] != UNLANDED
+    return has_copy(key)
+
+
+def read_landed(key: str) -> Optional[List[Dict]]:
+    """Records landed under ``key``, from the local copy or else from S3."""
     try:
-        s3.upload_file(local_path, RAW_BUCKET, s3_key)
-        print(f"☁️  Uploaded to s3://{RAW_BUCKET}/{s3_key}")
+        if key in _landed or has_copy(key):
+            with raw_storage().open(key).body as body:
+                return list(iter_json_records(open_decoded(body)))
     except Exception as e:
-        print(f"⚠️  Failed to upload {local_path} to S3: {e}")
+        print(f"⚠️  Could not read landed {key}: {e}")
+    return None
+
+
+class Uploader:
+    """Bounded background uploads to the raw store.
+
+    ``submit`` blocks while ``depth`` payloads are queued or uploading, so
+    fetching never runs further ahead of S3 than that. A key is recorded in
+    the landed index only once its upload succeeded; a key that failed every
+    attempt is reported to the submitter's ``failed_requests``.
+    """
+
+    def __init__(self, workers: int = UPLOAD_WORKERS, depth: int = UPLOAD_QUEUE,
+                 retries: int = UPLOAD_RETRIES):
+        self.workers = workers
+        self.retries = max(1, retries)
+        self.slots = threading.BoundedSemaphore(max(1, depth))
+        self.lock = threading.Lock()
+        self.pool: Optional[ThreadPoolExecutor] = None
+        self.pending: List[Future] = []
+        self.failed: List[str] = []
+
+    def submit(self, key: str, buf, size: int, new_digest: str):
+        """Upload ``size`` bytes of ``buf`` to ``key``; the buffer is closed afterwards."""
+        if self.workers <= 0:
+            self.upload(key, buf, size, new_digest)
+            return
+        self.slots.acquire()
+        with self.lock:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.workers,
+                                               thread_name_prefix="raw-upload")
+            # The copied context carries the submitter's failed_requests list
+            future = self.pool.submit(contextvars.copy_context().run,
+                                      self.upload, key, buf, size, new_digest)
+            self.pending.append(future)
+        future.add_done_callback(lambda _: self.slots.release())
+
+    def upload(self, key: str, buf, size: int, new_digest: str):
+        store = raw_storage()
+        try:
+            for attempt in range(1, self.retries + 1):
+                buf.seek(0)
+                try:
+                    with metrics.timed("upload_seconds", storage=store.name):
+                        store.put(key, buf, size, FORMATS[RAW_FORMAT]["content_type"])
+                except Exception as e:
+                    print(f"⚠️  Upload of {key} ({store.name}) attempt {attempt} failed: {e}")
+                    if attempt < self.retries:
+                        time.sleep(2 ** (attempt - 1))
+                    continue
+                mark_landed(key, new_digest)
+                print(f"☁️  Landed {size:,} bytes at {store.url(key)}")
+                return
+            metrics.inc("upload_failures_total", storage=store.name)
+            # The response is cached now, so the next run only retries a pending key
+            mark_landed(key, UNLANDED)
+            with self.lock:
+                self.failed.append(key)
+            failed = failed_requests.get()
+            if failed is not None:
+                failed.append(f"upload {key}")
+        finally:
+            buf.close()
+
+    def flush(self) -> List[str]:
+        """Wait for every upload queued so far; returns the keys that failed since
+        the last flush."""
+        with self.lock:
+            pending = list(self.pending)
+        for future in pending:
+            future.result()
+        with self.lock:
+            # Concurrent flushes (backfill partitions) each wait for everything
+            self.pending = [f for f in self.pending if not f.done()]
+            failed, self.failed = self.failed, []
+        if failed:
+            print(f"❌ {len(failed)} raw uploads failed: {', '.join(failed[:5])}"
+                  f"{' …' if len(failed) > 5 else ''}")
+        return failed
+
+
+uploader = Uploader()
+
+
+def upload_raw(data: Any, key: str, new_digest: str):
+    """Encode ``data`` in RAW_FORMAT and queue it for the raw store."""
+    buf = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    try:
+        encode(data, buf, RAW_FORMAT)
+    except Exception:
+        buf.close()
+        raise
+    uploader.submit(key, buf, buf.tell(), new_digest)
+
+
+def finish_landing() -> List[str]:
+    """Drain the upload queue and save the landed index; returns the failed keys."""
+    failed = uploader.flush()
+    save_landed()
+    return failed
+
+
+def land(data: Any, changed: bool, key: str) -> bool:
+    """Queue ``data`` for ``key`` unless that exact payload is already there.
+
+    A failed fetch (``data`` None) lands nothing, so the key stays pending.
+    """
+    if data is None:
+        return False
+    if not changed and is_landed(key):
+        return False
+    new = digest(data)
+    old = _landed.get(key)
+    if old is None and has_copy(key):
+        old = digest(read_landed(key))   # landed before the digest index existed
+    if new == old:
+        return False
+    upload_raw(data, key, new)
+    return True
+
+# ─── Watermark ──────────────────────────────────────────────────────────────────
+def parse_ts(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def watermark_path(year: int) -> str:
+    return os.path.join(STATE_ROOT, f"extract_watermark_{year}.json")
+
+
+def load_watermark(year: int = YEAR) -> Optional[Dict]:
+    for path in (watermark_path(year), WATERMARK_PATH):
+        try:
+            with open(path, encoding="utf-8") as f:
+                wm = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if wm.get("year") == year:
+            return wm
+    return None
+
+
+def save_watermark(wm: Optional[Dict]):
+    if wm is None:
+        return
+    ensure_dir(STATE_ROOT)
+    save_json(wm, watermark_path(wm["year"]))
+    print(f"📌 Watermark at session {wm['session_key']} (ended {wm['date_end']})")
+
+
+def below_watermark(session: Dict, wm: Optional[Dict]) -> bool:
+    end = parse_ts(session.get("date_end"))
+    return wm is not None and end is not None and end <= parse_ts(wm["date_end"])
+
+
+def advance_watermark(sessions: List[Dict], wm: Optional[Dict],
+                      year: int = YEAR) -> Optional[Dict]:
+    """Move the watermark to the latest session that has ended and settled."""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=SETTLE_HOURS)
+    settled = [s for s in sessions
+               if parse_ts(s.get("date_end")) and parse_ts(s["date_end"]) <= cutoff]
+    if not settled:
+        return wm
+    latest = max(settled, key=lambda s: parse_ts(s["date_end"]))
+    if below_watermark(latest, wm):
+        return wm
+    return {
+        "year":        year,
+        "meeting_key": latest["meeting_key"],
+        "session_key": latest["session_key"],
+        "date_end":    latest["date_end"],
+    }
+
+
+def landed_sessions(mk: int) -> List[Dict]:
+    return read_landed(raw_key("sessions", f"{mk}_sessions")) or []
+
+
+def pending_sessions(sessions: List[Dict], wm: Optional[Dict]) -> List[Dict]:
+    """Sessions that are new, still open, or whose results were never landed."""
+    return [
+        s for s in sessions
+        if not below_watermark(s, wm)
+        or not is_landed(raw_key("session_results", f"{s['meeting_key']}_{s['session_key']}"))
+    ]
 
 # ─── Extraction Steps ───────────────────────────────────────────────────────────
-def extract_meetings() -> List[int]:
-    out_dir = os.path.join(RAW_ROOT, "meetings")
-    ensure_dir(out_dir)
+def meetings_key(year: int = YEAR) -> str:
+    return raw_key("meetings", f"meetings_{year}")
 
-    data = fetch_json("meetings", {"year": YEAR})
-    filename = f"meetings_{YEAR}.json"
-    path = os.path.join(out_dir, filename)
-    save_json(data, path)
-    upload_to_s3(path, f"meetings/{filename}")
+
+def extract_meetings(year: int = YEAR) -> List[int]:
+    with metrics.stage("extract", step="meetings", season=year):
+        data, changed = fetch_json("meetings", {"year": year})
+        key = meetings_key(year)
+        land(data, changed, key)
 
     keys = [m["meeting_key"] for m in data] if isinstance(data, list) else []
-    print(f"✔ Saved {len(keys)} meetings to {path}")
-    time.sleep(THROTTLE_PAUSE)
+    print(f"✔ Saved {len(keys)} meetings to {key}")
     return keys
 
 
-def extract_drivers():
-    out_dir = os.path.join(RAW_ROOT, "drivers")
-    ensure_dir(out_dir)
+def extract_drivers(meeting_keys: List[int]):
+    """Land drivers for the given meetings as drivers/{meeting_key}.json."""
+    def extract_one(mk: int):
+        data, changed = fetch_json("drivers", {"meeting_key": mk})
+        key = raw_key("drivers", str(mk))
+        if land(data, changed, key):
+            count = len(data) if isinstance(data, list) else 0
+            print(f"✔ [{mk}] Saved {count} drivers to {key}")
+
+    run_parallel(extract_one, meeting_keys)
 
-    data = fetch_json("drivers")
-    filename = "drivers.json"
-    path = os.path.join(out_dir, filename)
-    save_json(data, path)
-    upload_to_s3(path, f"drivers/{filename}")
 
-    count = len(data) if isinstance(data, list) else 0
-    print(f"✔ Saved {count} drivers to {path}")
-    time.sleep(THROTTLE_PAUSE)
+def extract_sessions(meeting_keys: List[int], wm: Optional[Dict] = None) -> List[Dict]:
+    """Land sessions per meeting and return every session record.
 
+    Meetings whose landed sessions all ended before the watermark are read
+    back from disk instead of being fetched again.
+    """
+    def extract_one(mk: int) -> List[Dict]:
+        landed = landed_sessions(mk)
+        if landed and all(below_watermark(s, wm) for s in landed):
+            return landed
 
-def extract_sessions(meeting_keys: List[int]) -> List[Tuple[int, int]]:
-    out_dir = os.path.join(RAW_ROOT, "sessions")
-    ensure_dir(out_dir)
+        data, changed = fetch_json("sessions", {"meeting_key": mk})
+        key = raw_key("sessions", f"{mk}_sessions")
+        land(data, changed, key)
 
-    pairs: List[Tuple[int, int]] = []
-    for mk in meeting_keys:
-        data = fetch_json("sessions", {"meeting_key": mk})
-        filename = f"{mk}_sessions.json"
-        path = os.path.join(out_dir, filename)
-        save_json(data, path)
-        upload_to_s3(path, f"sessions/{filename}")
+        sessions = data if isinstance(data, list) else []
+        print(f"✔ [{mk}] Saved {len(sessions)} sessions to {key}")
+        return sessions
 
-        session_keys = [s["session_key"] for s in data] if isinstance(data, list) else []
-        print(f"✔ [{mk}] Saved {len(session_keys)} sessions to {path}")
-        for sk in session_keys:
-            pairs.append((mk, sk))
-        time.sleep(THROTTLE_PAUSE)
-    return pairs
+    return [s for sessions in run_parallel(extract_one, meeting_keys) for s in sessions]
 
 
 def extract_session_results(session_pairs: List[Tuple[int, int]]):
-    out_dir = os.path.join(RAW_ROOT, "session_results")
-    ensure_dir(out_dir)
+    def extract_one(pair: Tuple[int, int]):
+        mk, sk = pair
+        data, changed = fetch_json("session_result", {"session_key": sk})
+        key = raw_key("session_results", f"{mk}_{sk}")
+        if land(data, changed, key):
+            print(f"✔ [{mk}+{sk}] Saved session_result to {key}")
+
+    def extract_meeting(item: Tuple[int, List[int]]):
+        mk, session_keys = item
+        data, changed = fetch_json("session_result", {"meeting_key": mk})
+        if not isinstance(data, list):
+            print(f"⚠️  [{mk}] No session_result payload; leaving sessions pending")
+            return
+
+        by_session: Dict[int, List[Dict]] = {sk: [] for sk in session_keys}
+        for rec in data:
+            if rec.get("session_key") in by_session:
+                by_session[rec["session_key"]].append(rec)
 
+        for sk, rows in by_session.items():
+            key = raw_key("session_results", f"{mk}_{sk}")
+            # A changed meeting payload only rewrites the sessions that differ
+            if land(rows, changed, key):
+                print(f"✔ [{mk}+{sk}] Saved session_result to {key}")
+
+    if not BATCH_RESULTS:
+        run_parallel(extract_one, session_pairs)
+        return
+
+    by_meeting: Dict[int, List[int]] = {}
     for mk, sk in session_pairs:
-        data = fetch_json("session_result", {"session_key": sk})
-        filename = f"{mk}_{sk}.json"
-        path = os.path.join(out_dir, filename)
-        save_json(data, path)
-        upload_to_s3(path, f"session_results/{filename}")
-        print(f"✔ [{mk}+{sk}] Saved session_result to {path}")
-        time.sleep(THROTTLE_PAUSE)
+        by_meeting.setdefault(mk, []).append(sk)
+    run_parallel(extract_meeting, list(by_meeting.items()))
 
 
 def extract_starting_grids(meeting_keys: List[int]):
-    out_dir = os.path.join(RAW_ROOT, "starting_grids")
-    ensure_dir(out_dir)
-
-    for mk in meeting_keys:
-        data = fetch_json("starting_grid", {"meeting_key": mk})
-        filename = f"{mk}_starting_grid.json"
-        path = os.path.join(out_dir, filename)
-        save_json(data, path)
-        upload_to_s3(path, f"starting_grids/{filename}")
-        print(f"✔ [{mk}] Saved starting_grid to {path}")
-        time.sleep(THROTTLE_PAUSE)
+    def extract_one(mk: int):
+        data, changed = fetch_json("starting_grid", {"meeting_key": mk})
+        key = raw_key("starting_grids", f"{mk}_starting_grid")
+        if land(data, changed, key):
+            print(f"✔ [{mk}] Saved starting_grid to {key}")
+
+    run_parallel(extract_one, meeting_keys)
+
+def extract_details(meeting_keys: List[int], wm: Optional[Dict] = None) -> List[Dict]:
+    """Sessions, drivers, results and grids for ``meeting_keys``; returns the sessions."""
+    with metrics.stage("extract", step="sessions") as st:
+        sessions = extract_sessions(meeting_keys, wm)
+        st["meetings"] = len(meeting_keys)
+
+    pending = pending_sessions(sessions, wm)
+    print(f"🔎 {len(pending)} of {len(sessions)} sessions need results")
+    pending_meetings = {s["meeting_key"] for s in pending}
+    with metrics.stage("extract", step="drivers"):
+        extract_drivers([
+            mk for mk in meeting_keys
+            if mk in pending_meetings
+            or not is_landed(raw_key("drivers", str(mk)))
+        ])
+    with metrics.stage("extract", step="session_results") as st:
+        extract_session_results([(s["meeting_key"], s["session_key"]) for s in pending])
+        st["sessions"] = len(pending)
+    with metrics.stage("extract", step="starting_grids"):
+        extract_starting_grids([mk for mk in meeting_keys if mk in pending_meetings])
+    return sessions
+
+
+def landed_meeting_keys(year: int = YEAR) -> List[int]:
+    meetings = read_landed(meetings_key(year)) or []
+    return [m["meeting_key"] for m in meetings]
+
+# ─── Entry Points ───────────────────────────────────────────────────────────────
+def set_rate_limit(rate: float, burst: int = RATE_BURST):
+    """Re-size the shared token bucket, e.g. to a task's share of the budget."""
+    limiter.configure(rate, burst)
+
+
+def raise_if_failed(failed: List[str], what: str):
+    """Fail the step (and so its Airflow task, which then retries) if anything failed."""
+    if failed:
+        raise RuntimeError(f"{what}: {len(failed)} requests or uploads failed, "
+                           f"e.g. {failed[0]}")
+
+
+def land_meetings(year: int = YEAR) -> List[int]:
+    """Land the season's meetings and return their keys."""
+    failed = collecting_failures()
+    load_landed()
+    meeting_keys = extract_meetings(year)
+    finish_landing()
+    raise_if_failed(failed, f"{year} meetings")
+    return meeting_keys
+
+
+def extract_meeting_keys(meeting_keys: List[int], mode: str = EXTRACT_MODE, year: int = YEAR):
+    """Extract the given meetings of ``year``; its meetings list must already be landed.
+
+    Raises if any request or upload for them failed; what did land is kept.
+    """
+    failed = collecting_failures()
+    load_landed()
+    # Per-meeting tasks run concurrently, so the watermark is only read here
+    extract_details(meeting_keys, load_watermark(year) if mode == "incremental" else None)
+    finish_landing()
+    raise_if_failed(failed, f"meetings {', '.join(map(str, meeting_keys))}")
+    print(f"🎉 Extracted meetings {', '.join(map(str, meeting_keys))}")
+
+
+def advance_season_watermark(year: int = YEAR):
+    load_landed()
+    sessions = [s for mk in landed_meeting_keys(year) for s in landed_sessions(mk)]
+    save_watermark(advance_watermark(sessions, load_watermark(year), year))
+
+
+def extract_season(mode: str = EXTRACT_MODE, year: int = YEAR):
+    failed = collecting_failures()
+    load_landed()
+    watermark = load_watermark(year) if mode == "incremental" else None
+    meeting_keys = extract_meetings(year)
+    sessions = extract_details(meeting_keys, watermark)
+    if finish_landing() or failed:
+        # The next run must still see the sessions whose requests or uploads failed
+        print(f"⚠️  Watermark not advanced: {len(failed)} requests or uploads failed; "
+              f"rerun to retry them")
+    else:
+        save_watermark(advance_watermark(sessions, watermark, year))
+    print("🎉 Extraction complete!")
 
 # ─── Main Execution ─────────────────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract OpenF1 data to the raw zone")
+    parser.add_argument("--mode", choices=["full", "incremental"], default=EXTRACT_MODE)
+    parser.add_argument("--season", type=int, default=YEAR,
+                        help=f"season to extract (default: {YEAR})")
+    step = parser.add_mutually_exclusive_group()
+    step.add_argument("--meetings-only", action="store_true",
+                      help="land the season's meetings and print their keys as JSON")
+    step.add_argument("--meeting", type=int, action="append", metavar="MEETING_KEY",
+                      help="extract only these meetings (meetings must already be landed)")
+    step.add_argument("--advance-watermark", action="store_true",
+                      help="advance the watermark from the landed sessions")
+    args = parser.parse_args(argv)
+
+    print(f"🚀 Starting OpenF1 {args.season} {args.mode} data extraction "
+          f"({MAX_WORKERS} workers, {RATE_LIMIT:g} req/s, {RAW_FORMAT})…")
+    if args.meetings_only:
+        print(json.dumps(land_meetings(args.season)))  # last line: the meeting keys as JSON
+    elif args.meeting:
+        extract_meeting_keys(args.meeting, args.mode, args.season)
+    elif args.advance_watermark:
+        advance_season_watermark(args.season)
+    else:
+        extract_season(args.mode, args.season)
+    metrics.flush("extract")
+
+
 if __name__ == "__main__":
-    print(f"🚀 Starting OpenF1 {YEAR} data extraction…")
-    meeting_keys = extract_meetings()
-    extract_drivers()
-    session_pairs = extract_sessions(meeting_keys)
-    extract_session_results(session_pairs)
-    extract_starting_grids(meeting_keys)
-    print("🎉 Extraction complete!")
+    main()
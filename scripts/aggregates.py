@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# scripts/aggregates.py
+"""
+Analytical aggregates, refreshed for the sessions a load touched.
+
+  - session_positions: one row per driver per race session with grid and
+    finishing position, positions gained, points and DNF
+  - driver_standings:  season totals per driver (points, wins, podiums, DNFs,
+    dnf_rate, positions gained) and the championship position
+
+OpenF1 keys a starting grid by the qualifying session that set it, so a race
+takes its grid from that meeting's qualifying (Sprint Qualifying or Shootout
+for a sprint), and refreshing any session of a meeting refreshes its races.
+
+``refresh`` recomputes session_positions only for the given sessions, which
+the session_key indexes turn into index lookups. driver_standings is kept as
+a running sum: the old session rows are subtracted, the new ones added, and
+only the ranks of the affected seasons are recomputed. Refreshes of the same
+season are serialized with an advisory lock, so concurrent per-meeting loads
+cannot lose each other's deltas.
+
+    python scripts/aggregates.py --session 9158 --session 9159
+    python scripts/aggregates.py --all        # rebuild from scratch
+"""
+
+import os
+import argparse
+from typing import Iterable, List
+
+from sqlalchemy import text
+
+import metrics
+from clients import get_engine, once
+from schema import migrate
+
+# ─── CONFIG ───
+DATABASE_URL = os.getenv("DATABASE_URL")
+LOCK_KEY     = 0x46315F41   # (LOCK_KEY, season) advisory locks
+RACE_TYPES   = ("Race",)    # OpenF1 session_type of races and sprints
+
+# Contribution of a set of session_positions rows to driver_standings
+CONTRIBUTION = """
+    SELECT year, driver_number,
+           coalesce(sum(points), 0)                     AS points,
+           count(*)                                     AS races,
+           count(*) FILTER (WHERE finish_position = 1)  AS wins,
+           count(*) FILTER (WHERE finish_position <= 3) AS podiums,
+           count(*) FILTER (WHERE dnf)                  AS dnfs,
+           coalesce(sum(positions_gained), 0)           AS positions_gained
+    FROM session_positions
+    WHERE session_key = ANY(:keys) AND year IS NOT NULL
+    GROUP BY year, driver_number
+"""
+TOTALS = ("points", "races", "wins", "podiums", "dnfs", "positions_gained")
+
+AFFECTED_SEASONS = text("""
+    SELECT year FROM session_positions WHERE session_key = ANY(:keys) AND year IS NOT NULL
+    UNION
+    SELECT year FROM sessions WHERE session_key = ANY(:keys) AND year IS NOT NULL
+    ORDER BY year
+""")
+
+SUBTRACT_OLD = text(f"""
+    UPDATE driver_standings d
+    SET {", ".join(f"{c} = d.{c} - o.{c}" for c in TOTALS)}, refreshed_at = now()
+    FROM ({CONTRIBUTION}) o
+    WHERE d.year = o.year AND d.driver_number = o.driver_number
+""")
+
+# A meeting's races, for any session of it (e.g. the qualifying a grid belongs to)
+MEETING_RACES = text("""
+    SELECT r.session_key FROM sessions s
+    JOIN sessions r ON r.meeting_key = s.meeting_key AND r.session_type = ANY(:race_types)
+    WHERE s.session_key = ANY(:keys)
+""")
+
+DELETE_SESSIONS = text("DELETE FROM session_positions WHERE session_key = ANY(:keys)")
+
+INSERT_SESSIONS = text("""
+    INSERT INTO session_positions (session_key, driver_number, meeting_key, year, session_name,
+                                   grid_position, finish_position, positions_gained, points, dnf)
+    SELECT r.session_key, r.driver_number, r.meeting_key, s.year, s.session_name,
+           g.position, r.position, g.position - r.position,
+           coalesce(r.points, 0), coalesce(r.dnf, false)
+    FROM session_results r
+    JOIN sessions s ON s.session_key = r.session_key
+    LEFT JOIN LATERAL (
+        SELECT g.position FROM starting_grid g
+        JOIN sessions q ON q.session_key = g.session_key
+        WHERE g.meeting_key = r.meeting_key AND g.driver_number = r.driver_number
+          AND (q.session_name LIKE 'Sprint%') = (s.session_name LIKE 'Sprint%')
+        ORDER BY q.date_start DESC NULLS LAST
+        LIMIT 1
+    ) g ON true
+    WHERE r.session_key = ANY(:keys) AND s.session_type = ANY(:race_types)
+""")
+
+ADD_NEW = text(f"""
+    INSERT INTO driver_standings (year, driver_number, {", ".join(TOTALS)})
+    {CONTRIBUTION}
+    ON CONFLICT (year, driver_number) DO UPDATE
+    SET {", ".join(f"{c} = driver_standings.{c} + EXCLUDED.{c}" for c in TOTALS)},
+        refreshed_at = now()
+""")
+
+DROP_EMPTY = text("DELETE FROM driver_standings WHERE year = ANY(:years) AND races <= 0")
+
+RERANK = text("""
+    UPDATE driver_standings d SET position = r.position
+    FROM (SELECT year, driver_number,
+                 rank() OVER (PARTITION BY year ORDER BY points DESC, wins DESC) AS position
+          FROM driver_standings WHERE year = ANY(:years)) r
+    WHERE d.year = r.year AND d.driver_number = r.driver_number
+      AND d.position IS DISTINCT FROM r.position
+""")
+
+
+def refresh_in(conn, session_keys: Iterable[int]) -> int:
+    """Refresh the aggregates of ``session_keys`` in the caller's transaction."""
+    keys = {int(k) for k in session_keys}
+    if not keys:
+        return 0
+    race_types = list(RACE_TYPES)
+    keys |= set(conn.execute(MEETING_RACES, {"keys": list(keys), "race_types": race_types})
+                .scalars())
+    params = {"keys": sorted(keys)}
+    years = list(conn.execute(AFFECTED_SEASONS, params).scalars())
+    for year in years:   # sorted, so concurrent refreshes lock in the same order
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key, :year)"),
+                     {"key": LOCK_KEY, "year": year})
+
+    conn.execute(SUBTRACT_OLD, params)
+    conn.execute(DELETE_SESSIONS, params)
+    rows = conn.execute(INSERT_SESSIONS, {**params, "race_types": race_types}).rowcount
+    conn.execute(ADD_NEW, params)
+    conn.execute(DROP_EMPTY, {"years": years})
+    conn.execute(RERANK, {"years": years})
+    return rows
+
+
+def refresh(engine, session_keys: Iterable[int]) -> int:
+    """Refresh session_positions and driver_standings for ``session_keys``."""
+    keys = set(session_keys)
+    if not keys:
+        return 0
+    once(("schema", engine.url), lambda: migrate(engine))
+    with metrics.stage("aggregates") as st, engine.begin() as conn:
+        rows = refresh_in(conn, keys)
+        st.update(sessions=len(keys), rows=rows)
+    print(f"📊 Refreshed aggregates for {len(keys)} sessions ({rows} race results)")
+    return rows
+
+
+def rebuild(engine) -> int:
+    """Recompute every aggregate from the loaded tables, in one transaction."""
+    once(("schema", engine.url), lambda: migrate(engine))
+    with metrics.stage("aggregates", mode="rebuild") as st, engine.begin() as conn:
+        conn.exec_driver_sql("TRUNCATE session_positions, driver_standings")
+        keys: List[int] = list(conn.execute(text("SELECT session_key FROM sessions")).scalars())
+        rows = refresh_in(conn, keys)
+        st.update(sessions=len(keys), rows=rows)
+    print(f"📊 Rebuilt aggregates from {len(keys)} sessions ({rows} race results)")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh analytical aggregates")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--session", type=int, action="append", metavar="SESSION_KEY",
+                        help="refresh these sessions")
+    target.add_argument("--all", action="store_true", help="rebuild every aggregate")
+    args = parser.parse_args(argv)
+
+    engine = get_engine(DATABASE_URL)
+    if args.all:
+        rebuild(engine)
+    else:
+        refresh(engine, args.session)
+    metrics.flush("aggregates")
+
+
+if __name__ == "__main__":
+    main()
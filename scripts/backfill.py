@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# scripts/backfill.py
+"""
+Multi-season backfill: extract and transform every season in a year range.
+
+    python scripts/backfill.py 2023 2025              # seasons 2023 to 2025
+    python scripts/backfill.py 2023 2025 --restart    # ignore the checkpoint
+
+The work is split into partitions: one per season (land and transform its
+meetings list) and one per meeting (land its sessions, drivers, results and
+grids, then transform them). Partitions run on BACKFILL_WORKERS threads that
+all draw from Extract's shared token bucket, so the backfill as a whole stays
+within OPENF1_RATE_LIMIT however many run at once.
+
+Every finished partition is recorded in
+local_data/state/backfill_<first>_<last>.json. A rerun skips those and reuses
+the checkpoint's run_id, so the export at the end covers the whole backfill,
+interrupted or not. A partition with a request that failed outright is not
+recorded and is retried on the next run.
+"""
+
+import os
+import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Set
+
+import Extract
+import metrics
+import transform
+from export import EXPORT_MODE, EXPORT_MODES, export_run
+
+# ─── CONFIG ───
+WORKERS     = int(os.getenv("BACKFILL_WORKERS", "3"))
+PER_MEETING = [name for name, spec in transform.ENTITIES.items() if spec.per_meeting]
+
+
+# ─── CHECKPOINT ───
+class Checkpoint:
+    """Completed partitions of one backfill, saved after each one finishes."""
+
+    def __init__(self, path: str, restart: bool = False):
+        self.path = path
+        self.lock = threading.Lock()
+        state = {} if restart else self.read()
+        self.run_id: str = state.get("run_id") or f"backfill-{transform.RUN_ID}"
+        self.done: Set[str] = set(state.get("done", []))
+
+    def read(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def __contains__(self, partition: str) -> bool:
+        return partition in self.done
+
+    def mark(self, partition: str):
+        with self.lock:
+            self.done.add(partition)
+            Extract.ensure_dir(os.path.dirname(self.path))
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            Extract.save_json({"run_id": self.run_id, "done": sorted(self.done)}, tmp)
+            os.replace(tmp, self.path)
+
+
+def checkpoint_path(first: int, last: int) -> str:
+    return os.path.join(Extract.STATE_ROOT, f"backfill_{first}_{last}.json")
+
+
+# ─── PARTITIONS ───
+def run_season(year: int, cp: Checkpoint) -> List[int]:
+    """Land and transform the season's meetings; returns its meeting keys."""
+    partition = f"{year}/meetings"
+    if partition in cp:
+        keys = Extract.landed_meeting_keys(year)
+        if keys:
+            return keys
+
+    with metrics.stage("backfill", season=year) as st:
+        Extract.collecting_failures(fresh=True)
+        keys = Extract.land_meetings(year)   # raises if a request or upload failed
+        transform.run(["meetings"], season=year, export_mode="none", run_id=cp.run_id)
+        st.update(partition=partition, meetings=len(keys))
+    cp.mark(partition)
+    return keys
+
+
+def run_meeting(year: int, meeting_key: int, cp: Checkpoint):
+    partition = f"{year}/{meeting_key}"
+    with metrics.stage("backfill", season=year) as st:
+        st["partition"] = partition
+        Extract.collecting_failures(fresh=True)
+        Extract.extract_meeting_keys([meeting_key], "full", year)   # raises on failures
+        transform.run(PER_MEETING, meeting_key=meeting_key, export_mode="none",
+                      run_id=cp.run_id)
+    cp.mark(partition)
+
+
+# ─── RUNNER ───
+def backfill(first: int, last: int, workers: int = WORKERS, restart: bool = False,
+             export_mode: str = EXPORT_MODE) -> bool:
+    """Backfill seasons ``first``..``last``; False if any partition failed."""
+    cp = Checkpoint(checkpoint_path(first, last), restart)
+    years = list(range(first, last + 1))
+    print(f"⏮️  Backfilling {first}–{last} on {workers} workers (run {cp.run_id}, "
+          f"{len(cp.done)} partitions already done)…")
+    Extract.load_landed()
+
+    errors: List[str] = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        seasons = {year: pool.submit(run_season, year, cp) for year in years}
+        meetings = []
+        # A season's meetings are queued as soon as its list is in, while
+        # other seasons are still being landed
+        for year, future in seasons.items():
+            try:
+                keys = future.result()
+            except Exception as e:
+                errors.append(f"{year}/meetings: {e}")
+                continue
+            meetings += [pool.submit(run_meeting, year, mk, cp)
+                         for mk in keys if f"{year}/{mk}" not in cp]
+        for future in meetings:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(str(e))
+
+    if errors:
+        for error in errors:
+            print(f"❌ {error}")
+        print(f"⚠️  {len(errors)} partitions failed; rerun to resume from the checkpoint")
+        return False
+
+    export_run(mode=export_mode, run_id=cp.run_id)
+    print(f"🎉 Backfill {first}–{last} complete ({len(cp.done)} partitions)")
+    return True
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backfill several OpenF1 seasons")
+    parser.add_argument("first", type=int, help="first season, e.g. 2023")
+    parser.add_argument("last", type=int, nargs="?", help="last season (default: first)")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help=f"partitions processed concurrently (default: {WORKERS})")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore the checkpoint and redo every partition")
+    parser.add_argument("--export", choices=EXPORT_MODES, default=EXPORT_MODE,
+                        help=f"processed-zone export at the end (default: {EXPORT_MODE})")
+    args = parser.parse_args(argv)
+    last = args.first if args.last is None else args.last
+    if last < args.first:
+        parser.error("last season is before the first")
+
+    ok = backfill(args.first, last, args.workers, args.restart, args.export)
+    metrics.flush("backfill")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# scripts/bulk_upsert.py
+"""
+Batched INSERT ... ON CONFLICT DO UPDATE shared by the transform scripts.
+
+One upsert statement is built per table and executed with a list of
+parameter sets per batch, so SQLAlchemy sends multi-row VALUES
+(insertmanyvalues) instead of compiling and round-tripping once per record.
+
+``copy_merge`` is the alternative for full reloads: rows are streamed with
+COPY FROM STDIN into a temp staging table and merged with one set-based
+INSERT ... SELECT ... ON CONFLICT. ``write_rows`` picks the mode per table
+from LOAD_MODE / LOAD_MODE_<TABLE> ("upsert" or "copy").
+
+Tables with an ``updated_at`` column are change-tracked: a conflicting row is
+only rewritten when a data column actually differs, and then ``updated_at``
+is bumped to now(), ``run_id`` taken from the incoming row and ``change_xid``
+set to the writing transaction's id (new rows get all three by default).
+now() is when the transaction started, so only change_xid tells a reader
+whether the change was committed before a given snapshot.
+
+With ``returning="<column>"`` the writers collect that column of the rows
+they actually inserted or changed in ``UpsertStats.returned``, so callers can
+tell what a write touched without querying it back.
+"""
+
+import io
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+from sqlalchemy import Table, func, literal_column, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+# ─── CONFIG ───
+BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "1000"))
+LOAD_MODE  = os.getenv("LOAD_MODE", "upsert")   # upsert | copy
+
+UPDATED_AT     = "updated_at"
+RUN_ID         = "run_id"
+CHANGE_XID     = "change_xid"
+CHANGE_COLUMNS = (UPDATED_AT, RUN_ID, CHANGE_XID)
+CURRENT_XID    = "pg_current_xact_id()::text::bigint"   # change_xid's value and default
+
+
+@dataclass
+class UpsertStats:
+    rows: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    returned: Set[Any] = field(default_factory=set)   # see ``returning``
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def load_mode(table: Table) -> str:
+    mode = os.getenv(f"LOAD_MODE_{table.name.upper()}", LOAD_MODE)
+    if mode not in ("upsert", "copy"):
+        raise ValueError(f"Unknown load mode {mode!r} for {table.name}")
+    return mode
+
+
+def tracks_changes(table: Table) -> bool:
+    return UPDATED_AT in table.c
+
+
+def data_columns(table: Table, key_columns: Sequence[str]) -> List[str]:
+    """Non-key columns, excluding the change-tracking ones."""
+    return [c.name for c in table.columns
+            if c.name not in key_columns and c.name not in CHANGE_COLUMNS]
+
+
+def upsert_statement(table: Table, key_columns: Sequence[str],
+                     update_columns: Optional[Sequence[str]] = None):
+    """Build the upsert for ``table``; non-key columns are updated by default."""
+    stmt = pg_insert(table)
+    if update_columns is None:
+        update_columns = data_columns(table, key_columns)
+    if not update_columns:
+        return stmt.on_conflict_do_nothing(index_elements=list(key_columns))
+
+    set_ = {name: stmt.excluded[name] for name in update_columns}
+    where = None
+    if tracks_changes(table):
+        set_[UPDATED_AT] = func.now()
+        if RUN_ID in table.c:
+            set_[RUN_ID] = stmt.excluded[RUN_ID]
+        if CHANGE_XID in table.c:
+            set_[CHANGE_XID] = literal_column(CURRENT_XID)
+        where = or_(*(table.c[name].is_distinct_from(stmt.excluded[name])
+                      for name in update_columns))
+    return stmt.on_conflict_do_update(
+        index_elements=list(key_columns), set_=set_, where=where,
+    )
+
+
+def batched(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    it = iter(rows)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def dedupe(batch: List[Dict], key_columns: Sequence[str]) -> List[Dict]:
+    """Keep the last row per key; Postgres rejects a batch that hits one key twice."""
+    by_key = {tuple(row[k] for k in key_columns): row for row in batch}
+    return list(by_key.values()) if len(by_key) < len(batch) else batch
+
+
+def bulk_upsert(conn, table: Table, rows: Iterable[Dict], key_columns: Sequence[str],
+                update_columns: Optional[Sequence[str]] = None,
+                batch_size: Optional[int] = None,
+                returning: Optional[str] = None) -> UpsertStats:
+    """Upsert ``rows`` into ``table`` in batches on an open connection.
+
+    ``rows`` may be any iterable (including a generator); it is consumed one
+    batch at a time so memory stays bounded by ``batch_size``.
+    """
+    stmt = upsert_statement(table, key_columns, update_columns)
+    if returning:
+        stmt = stmt.returning(table.c[returning])
+    stats = UpsertStats()
+    started = time.perf_counter()
+
+    for batch in batched(rows, batch_size or BATCH_SIZE):
+        result = conn.execute(stmt, dedupe(batch, key_columns))
+        if returning:
+            stats.returned.update(result.scalars())
+        stats.rows += len(batch)
+        stats.batches += 1
+
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def csv_field(value) -> str:
+    """Render one value for COPY ... (FORMAT csv): NULL unquoted, text quoted."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class CsvStream(io.RawIOBase):
+    """File-like object that renders rows as CSV lazily for COPY FROM STDIN."""
+
+    def __init__(self, rows: Iterable[Dict], columns: Sequence[str]):
+        self.rows = iter(rows)
+        self.columns = columns
+        self.count = 0
+        self.buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        lines = []
+        pending = len(self.buffer)
+        while size < 0 or pending < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            line = (",".join(csv_field(row.get(c)) for c in self.columns) + "\n").encode("utf-8")
+            lines.append(line)
+            pending += len(line)
+            self.count += 1
+        data = self.buffer + b"".join(lines)
+        if size < 0:
+            size = len(data)
+        chunk, self.buffer = data[:size], data[size:]
+        return chunk
+
+
+def copy_merge(conn, table: Table, rows: Iterable[Dict], key_columns: Sequence[str],
+               update_columns: Optional[Sequence[str]] = None,
+               returning: Optional[str] = None) -> UpsertStats:
+    """Stream ``rows`` into a temp staging table with COPY and merge in one statement.
+
+    Must run inside a transaction; the staging table is dropped on commit.
+    When a key appears more than once, the row streamed last wins.
+    """
+    quote = conn.dialect.identifier_preparer.quote
+    target = quote(table.name)
+    staging = quote(f"_stage_{table.name}")
+    tracked = tracks_changes(table)
+    # updated_at and change_xid are left to the column defaults on insert
+    columns = [c.name for c in table.columns
+               if not (tracked and c.name in (UPDATED_AT, CHANGE_XID))]
+    col_list = ", ".join(quote(c) for c in columns)
+    key_list = ", ".join(quote(k) for k in key_columns)
+    if update_columns is None:
+        update_columns = data_columns(table, key_columns)
+
+    started = time.perf_counter()
+    conn.exec_driver_sql(
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+        f"(LIKE {target} INCLUDING DEFAULTS, _stage_seq bigint GENERATED ALWAYS AS IDENTITY) "
+        f"ON COMMIT DROP"
+    )
+    conn.exec_driver_sql(f"TRUNCATE {staging}")
+
+    stream = CsvStream(rows, columns)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {staging} ({col_list}) FROM STDIN WITH (FORMAT csv)", stream)
+    finally:
+        cursor.close()
+
+    if not update_columns:
+        action = "DO NOTHING"
+    else:
+        assignments = [f"{quote(c)} = EXCLUDED.{quote(c)}" for c in update_columns]
+        condition = ""
+        if tracked:
+            assignments.append(f"{quote(UPDATED_AT)} = now()")
+            if RUN_ID in table.c:
+                assignments.append(f"{quote(RUN_ID)} = EXCLUDED.{quote(RUN_ID)}")
+            if CHANGE_XID in table.c:
+                assignments.append(f"{quote(CHANGE_XID)} = {CURRENT_XID}")
+            current = ", ".join(f"{target}.{quote(c)}" for c in update_columns)
+            incoming = ", ".join(f"EXCLUDED.{quote(c)}" for c in update_columns)
+            condition = f" WHERE ROW({current}) IS DISTINCT FROM ROW({incoming})"
+        action = "DO UPDATE SET " + ", ".join(assignments) + condition
+    result = conn.exec_driver_sql(
+        f"INSERT INTO {target} ({col_list}) "
+        f"SELECT DISTINCT ON ({key_list}) {col_list} FROM {staging} "
+        f"ORDER BY {key_list}, _stage_seq DESC "
+        f"ON CONFLICT ({key_list}) {action}"
+        + (f" RETURNING {quote(returning)}" if returning else "")
+    )
+
+    return UpsertStats(rows=stream.count, batches=1,
+                       seconds=time.perf_counter() - started,
+                       returned=set(result.scalars()) if returning else set())
+
+
+def write_rows(conn, table: Table, rows: Iterable[Dict], key_columns: Sequence[str],
+               update_columns: Optional[Sequence[str]] = None,
+               returning: Optional[str] = None) -> UpsertStats:
+    """Upsert ``rows`` using the load mode configured for ``table``."""
+    if load_mode(table) == "copy":
+        return copy_merge(conn, table, rows, key_columns, update_columns, returning)
+    return bulk_upsert(conn, table, rows, key_columns, update_columns, returning=returning)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# scripts/clients.py
+"""
+Process-wide S3 clients and SQLAlchemy engines, created on first use.
+
+Importing a pipeline module no longer opens connections; the first call that
+needs S3 or Postgres builds the client and every later call in the same
+process (a CLI run, or an Airflow worker executing several @task callables)
+reuses it and its connection pool.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+import boto3
+from botocore.config import Config
+from sqlalchemy import create_engine
+
+_clients: Dict[Hashable, Any] = {}
+_lock = threading.RLock()
+
+
+def _cached(key: Hashable, factory: Callable[[], Any]) -> Any:
+    # boto3's default session is not thread-safe, so creation is serialized
+    with _lock:
+        if key not in _clients:
+            _clients[key] = factory()
+        return _clients[key]
+
+
+def get_s3(max_pool_connections: int = 10):
+    return _cached(
+        ("s3", max_pool_connections),
+        lambda: boto3.client("s3", config=Config(max_pool_connections=max_pool_connections)),
+    )
+
+
+def get_engine(url: str, pool_size: int = 5):
+    if not url:
+        raise RuntimeError("DATABASE_URL environment variable is required")
+    return _cached(
+        ("engine", url, pool_size),
+        lambda: create_engine(url, echo=False, future=True,
+                              pool_size=pool_size, pool_pre_ping=True),
+    )
+
+
+def once(key: Hashable, fn: Callable[[], Any]):
+    """Run ``fn`` the first time ``key`` is seen in this process (e.g. DDL)."""
+    _cached(("once", key), lambda: fn() or True)
+
+
+def reset():
+    """Dispose every engine and forget all clients (e.g. after a fork)."""
+    with _lock:
+        for key, client in _clients.items():
+            if key[0] == "engine":
+                client.dispose()
+        _clients.clear()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# scripts/entities.py
+"""
+Table schemas and per-entity transform specs.
+
+Each EntitySpec tells transform.py where an entity's raw objects live, which
+fields to copy from a raw record, the key columns used for validation and
+upserts, and how the processed export is laid out. Incremental specs (the
+default) only read raw objects whose ETag differs from the one recorded in
+raw_manifest, so unchanged objects are never downloaded or re-upserted.
+
+Entity tables carry updated_at/run_id/change_xid change columns, stamped by
+the upsert only when a row's data actually changes; export.py reads deltas
+off change_xid, the id of the transaction that wrote the row.
+
+Dates are timestamptz and GMT offsets interval; Postgres parses the raw ISO
+strings on insert. Join keys carry secondary indexes. schema.py creates and
+migrates these tables; nothing else should call create_all.
+
+Raw records missing a required column are not upserted but kept in
+quarantine, one row per record with the object it came from and what was
+missing.
+
+The aggregate tables at the end are derived, not loaded: aggregates.py keeps
+them up to date for the sessions each load touches.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+from sqlalchemy import (
+    MetaData,
+    Table,
+    Column,
+    Integer,
+    String,
+    Boolean,
+    BigInteger,
+    Computed,
+    Float,
+    DateTime,
+    Index,
+    Interval,
+    JSON,
+    func,
+    text,
+)
+
+from bulk_upsert import CHANGE_COLUMNS, CURRENT_XID
+
+metadata = MetaData()
+
+
+def change_columns():
+    return (
+        Column("updated_at", DateTime(timezone=True), nullable=False,
+               server_default=func.now(), index=True),
+        Column("run_id", String),
+        # NULL on rows written before migration 5
+        Column("change_xid", BigInteger, server_default=text(CURRENT_XID), index=True),
+    )
+
+# ─── SCHEMA ───
+meetings = Table(
+    "meetings",
+    metadata,
+    Column("meeting_key", Integer, primary_key=True),
+    Column("circuit_key", Integer),
+    Column("circuit_short_name", String),
+    Column("meeting_code", String),
+    Column("location", String),
+    Column("country_key", Integer),
+    Column("country_code", String),
+    Column("country_name", String),
+    Column("meeting_name", String),
+    Column("meeting_official_name", String),
+    Column("gmt_offset", Interval),
+    Column("date_start", DateTime(timezone=True)),
+    Column("year", Integer, index=True),
+    *change_columns(),
+)
+
+drivers = Table(
+    "drivers",
+    metadata,
+    Column("meeting_key", Integer, primary_key=True),
+    Column("session_key", Integer, primary_key=True),
+    Column("driver_number", Integer, primary_key=True),
+    Column("full_name", String),
+    Column("first_name", String),
+    Column("last_name", String),
+    Column("team_name", String),
+    *change_columns(),
+    Index("ix_drivers_session_key_driver_number", "session_key", "driver_number"),
+)
+
+sessions = Table(
+    "sessions",
+    metadata,
+    Column("session_key", Integer, primary_key=True),
+    Column("meeting_key", Integer, index=True),
+    Column("session_type", String),
+    Column("session_name", String),
+    Column("location", String),
+    Column("country_code", String),
+    Column("country_name", String),
+    Column("circuit_key", Integer),
+    Column("circuit_short_name", String),
+    Column("gmt_offset", Interval),
+    Column("date_start", DateTime(timezone=True)),
+    Column("date_end", DateTime(timezone=True)),
+    Column("year", Integer),
+    *change_columns(),
+)
+
+session_results = Table(
+    "session_results",
+    metadata,
+    Column("meeting_key", Integer, primary_key=True),
+    Column("session_key", Integer, primary_key=True, index=True),
+    Column("driver_number", Integer, primary_key=True, index=True),
+    Column("position", Integer),
+    Column("number_of_laps", Integer),
+    Column("points", Float),
+    Column("dnf", Boolean),
+    Column("dns", Boolean),
+    Column("dsq", Boolean),
+    *change_columns(),
+)
+
+starting_grid = Table(
+    "starting_grid",
+    metadata,
+    Column("meeting_key", Integer, primary_key=True),
+    Column("session_key", Integer, primary_key=True, index=True),
+    Column("driver_number", Integer, primary_key=True, index=True),
+    Column("position", Integer),
+    Column("lap_duration", Float),
+    *change_columns(),
+)
+
+raw_manifest = Table(
+    "raw_manifest",
+    metadata,
+    Column("key", String, primary_key=True),
+    Column("etag", String, nullable=False),          # S3 ETag: the object's content hash
+    Column("processed_at", DateTime(timezone=True), server_default=func.now()),
+    Column("run_id", String),                        # last run that processed the object
+)
+
+export_state = Table(
+    "export_state",
+    metadata,
+    Column("entity", String, primary_key=True),
+    Column("version", Integer, nullable=False),
+    Column("exported_through", DateTime(timezone=True), nullable=False),
+    Column("exported_snapshot", String),   # pg_snapshot the last delta was read in
+    Column("exported_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+# Rejected raw records; rewritten whenever their raw object is processed again
+quarantine = Table(
+    "quarantine",
+    metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    Column("entity", String, nullable=False),
+    Column("raw_key", String, nullable=False, index=True),
+    Column("reason", String, nullable=False),
+    Column("record", JSON, nullable=False),          # the record projected onto the table
+    Column("run_id", String),
+    Column("quarantined_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+# ─── AGGREGATES ───
+# One row per driver per race session: grid against finish
+session_positions = Table(
+    "session_positions",
+    metadata,
+    Column("session_key", Integer, primary_key=True),
+    Column("driver_number", Integer, primary_key=True, index=True),
+    Column("meeting_key", Integer, nullable=False, index=True),
+    Column("year", Integer, index=True),
+    Column("session_name", String),
+    Column("grid_position", Integer),
+    Column("finish_position", Integer),
+    Column("positions_gained", Integer),
+    Column("points", Float, nullable=False),
+    Column("dnf", Boolean, nullable=False),
+    Column("refreshed_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+# Season totals per driver, maintained as deltas of session_positions
+driver_standings = Table(
+    "driver_standings",
+    metadata,
+    Column("year", Integer, primary_key=True),
+    Column("driver_number", Integer, primary_key=True),
+    Column("position", Integer),
+    Column("points", Float, nullable=False),
+    Column("races", Integer, nullable=False),
+    Column("wins", Integer, nullable=False),
+    Column("podiums", Integer, nullable=False),
+    Column("dnfs", Integer, nullable=False),
+    Column("dnf_rate", Float, Computed("dnfs::float8 / NULLIF(races, 0)")),
+    Column("positions_gained", Integer, nullable=False),
+    Column("refreshed_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+schema_version = Table(
+    "schema_version",
+    metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+# ─── SPECS ───
+@dataclass(frozen=True)
+class EntitySpec:
+    name: str          # CLI name and processed/ folder
+    table: Table
+    raw_prefix: str    # S3 prefix (or exact key) of the raw objects
+    field_map: Dict[str, str] = field(default_factory=dict)  # column -> raw field, if renamed
+    required: Tuple[str, ...] = ()                           # defaults to the key columns
+    incremental: bool = True                                 # skip raw objects already processed
+    partition_by: str = "meeting_key"                        # processed-zone partition column
+    per_meeting: bool = True                                 # raw keys start with the meeting_key,
+                                                             # else with the season
+
+    @property
+    def key_columns(self) -> Tuple[str, ...]:
+        return tuple(c.name for c in self.table.primary_key.columns)
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return tuple(c.name for c in self.table.columns if c.name not in CHANGE_COLUMNS)
+
+    @property
+    def required_columns(self) -> Tuple[str, ...]:
+        return self.required or self.key_columns
+
+    @property
+    def processed_key(self) -> str:
+        return f"{self.name}/{self.name}.json"
+
+    @property
+    def raw_fields(self) -> Tuple[str, ...]:
+        """The raw field each of ``fields`` is read from."""
+        return tuple(self.field_map.get(col, col) for col in self.fields)
+
+    def project(self, rec: Dict) -> Dict:
+        return {col: rec.get(raw) for col, raw in zip(self.fields, self.raw_fields)}
+
+    def missing(self, row: Dict) -> Tuple[str, ...]:
+        """Required columns the projected ``row`` has no value for."""
+        return tuple(col for col in self.required_columns if row[col] is None)
+
+
+ENTITIES: Dict[str, EntitySpec] = {
+    spec.name: spec
+    for spec in (
+        EntitySpec("meetings",        meetings,        "meetings/meetings_",
+                   partition_by="year", per_meeting=False),
+        EntitySpec("sessions",        sessions,        "sessions/"),
+        EntitySpec("drivers",         drivers,         "drivers/"),
+        EntitySpec("session_results", session_results, "session_results/"),
+        EntitySpec("starting_grids",  starting_grid,   "starting_grids/"),
+    )
+}
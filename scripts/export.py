@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# scripts/export.py
+"""
+Processed-zone export for transformed tables.
+
+EXPORT_FORMAT=parquet (default when pyarrow is installed) streams rows with a
+server-side cursor and writes compressed Parquet partitioned by the entity's
+partition column, e.g. processed/session_results/meeting_key=1254/part-0.parquet.
+Only partitions touched by the current run are rewritten and uploaded.
+
+EXPORT_FORMAT=json keeps the legacy single {entity}/{entity}.json dump.
+
+EXPORT_MODE=delta (the default) instead writes only the rows changed since the
+last successful export, as a versioned change set
+{entity}/deltas/v000042.parquet (or .ndjson.gz without pyarrow), listed in
+{entity}/deltas/manifest.json. Progress is kept in the export_state table as
+the snapshot the last delta was read in: a row is in the next delta when the
+transaction that wrote it (change_xid) was not visible to that snapshot, so a
+writer that commits while an export runs is never skipped, however early it
+started.
+EXPORT_MODE=snapshot runs the partition/JSON export; "both" runs both.
+
+Files are written under local_data/processed and published to
+PROCESSED_STORAGE (storage.py; S3 by default, "local" leaves them in place).
+
+Run on its own, the module exports what the current RUN_ID changed. The DAG
+uses that to write one delta after all per-meeting transforms finished:
+
+    python scripts/export.py [entities...] [--mode delta|snapshot|both]
+"""
+
+import os
+import gzip
+import json
+import argparse
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from sqlalchemy import (Boolean, Column, DateTime, Float, Integer, Interval, Table, distinct,
+                        select, text)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = pq = None
+
+import metrics
+from bulk_upsert import CHANGE_XID
+from entities import ENTITIES, EntitySpec, export_state
+from storage import PROCESSED_STORAGE, Storage, open_storage
+
+# ─── CONFIG ───
+PROCESSED_BUCKET    = os.getenv("PROCESSED_BUCKET", "etl-f1-processed")
+PROCESSED_ROOT      = os.path.join("local_data", "processed")
+EXPORT_FORMAT       = os.getenv("EXPORT_FORMAT", "parquet" if pa else "json")
+EXPORT_MODE         = os.getenv("EXPORT_MODE", "delta")   # delta | snapshot | both | none
+EXPORT_MODES        = ("delta", "snapshot", "both", "none")
+EXPORT_BATCH        = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+
+
+def ensure_dir(path: str):
+    os.makedirs(path, exist_ok=True)
+
+
+def processed_storage() -> Storage:
+    return open_storage(PROCESSED_STORAGE, bucket=PROCESSED_BUCKET, root=PROCESSED_ROOT)
+
+
+def upload(store: Storage, local_path: str, key: str, label: str) -> bool:
+    try:
+        store.put_file(key, local_path)
+        print(f"☁️  Published processed {label} to {store.url(key)}")
+        return True
+    except Exception as e:
+        print(f"⚠️  Failed to upload processed {label}: {e}")
+        return False
+
+
+def stream_rows(engine, stmt) -> Iterator[Dict]:
+    """Iterate a SELECT through a server-side cursor, EXPORT_BATCH rows at a time."""
+    with engine.connect() as conn:
+        yield from stream_rows_in(conn, stmt)
+
+
+def stream_rows_in(conn, stmt) -> Iterator[Dict]:
+    result = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH).execute(stmt)
+    for row in result.mappings():
+        yield dict(row)
+
+
+def exported_columns(table: Table) -> List[Column]:
+    """Every column but change_xid, a transaction id only meaningful in this database."""
+    return [c for c in table.columns if c.name != CHANGE_XID]
+
+
+# ─── PARQUET ───
+def arrow_schema(table: Table):
+    def arrow_type(col):
+        if isinstance(col.type, Boolean):
+            return pa.bool_()
+        if isinstance(col.type, Integer):
+            return pa.int64()
+        if isinstance(col.type, Float):
+            return pa.float64()
+        if isinstance(col.type, DateTime):
+            return pa.timestamp("us", tz="UTC")
+        if isinstance(col.type, Interval):
+            return pa.duration("us")
+        return pa.string()
+
+    return pa.schema([pa.field(col.name, arrow_type(col)) for col in exported_columns(table)])
+
+
+def write_partition(path: str, schema, rows: Iterable[Dict]) -> int:
+    """Write ``rows`` as one Parquet file, one row group per EXPORT_BATCH rows."""
+    count, batch = 0, []
+    with pq.ParquetWriter(path, schema, compression=PARQUET_COMPRESSION) as writer:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= EXPORT_BATCH:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count, batch = count + len(batch), []
+        if batch or not count:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+
+def export_parquet(engine, store: Storage, spec: EntitySpec, touched: Set):
+    if pa is None:
+        raise RuntimeError("EXPORT_FORMAT=parquet requires pyarrow")
+    if not touched:
+        print(f"⏭️  No {spec.name} partitions touched; nothing to export")
+        return
+
+    part_col = spec.table.c[spec.partition_by]
+    schema = arrow_schema(spec.table)
+    stmt = (select(*exported_columns(spec.table))
+            .where(part_col.in_(sorted(touched)))
+            .order_by(part_col))
+
+    # Rows arrive ordered by partition, so each file is written while streaming
+    rows = stream_rows(engine, stmt)
+    row = next(rows, None)
+    exported: List[str] = []
+    failed: List[str] = []
+    while row is not None:
+        value = row[spec.partition_by]
+
+        def partition_rows():
+            nonlocal row
+            while row is not None and row[spec.partition_by] == value:
+                yield row
+                row = next(rows, None)
+
+        key = f"{spec.name}/{spec.partition_by}={value}/part-0.parquet"
+        path = os.path.join(PROCESSED_ROOT, *key.split("/"))
+        ensure_dir(os.path.dirname(path))
+        write_partition(path, schema, partition_rows())
+        if upload(store, path, key, f"{spec.name} {spec.partition_by}={value}"):
+            exported.append(key)
+        else:
+            failed.append(key)
+
+    print(f"📦 Exported {len(exported)} {spec.name} partitions as Parquet")
+    if failed:
+        raise RuntimeError(f"{len(failed)} {spec.name} partitions were not published: "
+                           f"{', '.join(failed[:5])}")
+
+
+# ─── JSON ───
+def export_json(engine, store: Storage, spec: EntitySpec):
+    processed_dir  = os.path.join(PROCESSED_ROOT, spec.name)
+    processed_file = os.path.join(processed_dir, f"{spec.name}.json")
+    ensure_dir(processed_dir)
+
+    # Streamed to disk as a JSON array; the table is never held in memory
+    with open(processed_file, "w", encoding="utf-8") as pf:
+        pf.write("[")
+        for i, row in enumerate(stream_rows(engine, select(*exported_columns(spec.table)))):
+            pf.write(",\n" if i else "\n")
+            json.dump(row, pf, ensure_ascii=False, default=str)
+        pf.write("\n]")
+
+    if not upload(store, processed_file, spec.processed_key, spec.name):
+        raise RuntimeError(f"{spec.name} export was not published")
+
+
+# ─── DELTA ───
+def write_ndjson_gz(path: str, rows: Iterable[Dict]) -> int:
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+            count += 1
+    return count
+
+
+def load_manifest(store: Storage, key: str, local_path: str) -> List[Dict]:
+    try:
+        with closing(store.open(key).body) as body:
+            return json.loads(body.read())
+    except Exception:
+        pass
+    try:
+        with open(local_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def changed_since(snapshot: str):
+    """Rows written by transactions that ``snapshot`` did not see committed."""
+    return text(
+        f"{CHANGE_XID} >= pg_snapshot_xmin(CAST(:snapshot AS pg_snapshot))::text::bigint "
+        f"AND NOT pg_visible_in_snapshot({CHANGE_XID}::text::xid8, "
+        f"CAST(:snapshot AS pg_snapshot))"
+    ).bindparams(snapshot=snapshot)
+
+
+def export_delta(engine, store: Storage, spec: EntitySpec, run_id: Optional[str] = None):
+    """Export rows changed since the last successful delta as the next version."""
+    with engine.connect() as conn:
+        state = conn.execute(
+            select(export_state).where(export_state.c.entity == spec.name)
+        ).mappings().first()
+    since = state["exported_through"] if state else None
+    previous = state["exported_snapshot"] if state else None
+    version = (state["version"] if state else 0) + 1
+
+    updated_at = spec.table.c.updated_at
+    stmt = select(*exported_columns(spec.table)).order_by(updated_at)
+    if previous is not None:
+        stmt = stmt.where(changed_since(previous))
+    elif since is not None:
+        stmt = stmt.where(updated_at > since)   # state written before change_xid existed
+
+    through: List[datetime] = []
+
+    def tracked(rows: Iterator[Dict]) -> Iterator[Dict]:
+        for row in rows:
+            through[:] = [row["updated_at"]]
+            yield row
+
+    delta_dir = os.path.join(PROCESSED_ROOT, spec.name, "deltas")
+    ensure_dir(delta_dir)
+    ext = "parquet" if pa is not None else "ndjson.gz"
+    filename = f"v{version:06d}.{ext}"
+    path = os.path.join(delta_dir, filename)
+    # One REPEATABLE READ transaction, so the rows read are exactly those its
+    # snapshot sees committed; the next delta starts from that snapshot
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="REPEATABLE READ")
+        with conn.begin():
+            snapshot = conn.execute(text("SELECT pg_current_snapshot()::text")).scalar()
+            rows = tracked(stream_rows_in(conn, stmt))
+            if pa is not None:
+                count = write_partition(path, arrow_schema(spec.table), rows)
+            else:
+                count = write_ndjson_gz(path, rows)
+
+    if not count:
+        os.remove(path)
+        print(f"⏭️  No {spec.name} changes since the last export")
+        return
+
+    key = f"{spec.name}/deltas/{filename}"
+    if not upload(store, path, key, f"{spec.name} delta v{version}"):
+        return  # state is not advanced, so the next run re-exports these rows
+
+    manifest_key = f"{spec.name}/deltas/manifest.json"
+    manifest_path = os.path.join(delta_dir, "manifest.json")
+    manifest = load_manifest(store, manifest_key, manifest_path)
+    manifest.append({
+        "version":    version,
+        "key":        key,
+        "rows":       count,
+        "since":      since.isoformat() if since else None,
+        "through":    through[0].isoformat(),
+        "snapshot":   snapshot,
+        "run_id":     run_id,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    })
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    upload(store, manifest_path, manifest_key, f"{spec.name} delta manifest")
+
+    stmt = pg_insert(export_state).values(
+        entity=spec.name, version=version, exported_through=through[0],
+        exported_snapshot=snapshot,
+    )
+    with engine.begin() as conn:
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=["entity"],
+            set_={
+                "version":           stmt.excluded.version,
+                "exported_through":  stmt.excluded.exported_through,
+                "exported_snapshot": stmt.excluded.exported_snapshot,
+                "exported_at":       datetime.now(timezone.utc),
+            },
+        ))
+    print(f"🧾 Exported {count} changed {spec.name} rows as delta v{version}")
+
+
+def export_entity(engine, store: Storage, spec: EntitySpec, touched: Set,
+                  run_id: Optional[str] = None, mode: str = EXPORT_MODE):
+    if mode not in EXPORT_MODES:
+        raise ValueError(f"Unknown EXPORT_MODE {mode!r}")
+    if mode in ("snapshot", "both"):
+        with metrics.stage("export", entity=spec.name, mode="snapshot"):
+            if EXPORT_FORMAT == "parquet":
+                export_parquet(engine, store, spec, touched)
+            elif EXPORT_FORMAT == "json":
+                export_json(engine, store, spec)
+            else:
+                raise ValueError(f"Unknown EXPORT_FORMAT {EXPORT_FORMAT!r}")
+    if mode in ("delta", "both"):
+        with metrics.stage("export", entity=spec.name, mode="delta"):
+            export_delta(engine, store, spec, run_id)
+
+
+def touched_by_run(engine, spec: EntitySpec, run_id: str) -> Set:
+    """Partition values of the rows ``run_id`` inserted or changed."""
+    part_col = spec.table.c[spec.partition_by]
+    with engine.connect() as conn:
+        return set(conn.execute(
+            select(distinct(part_col)).where(spec.table.c.run_id == run_id)
+        ).scalars())
+
+
+def export_run(names: Optional[List[str]] = None, mode: str = EXPORT_MODE,
+               run_id: Optional[str] = None):
+    """Export what ``run_id`` (default: this process's RUN_ID) changed."""
+    from transform import RUN_ID, make_engine, prepare_schema  # transform imports us
+
+    run_id = run_id or RUN_ID
+    store, engine = processed_storage(), make_engine()
+    prepare_schema(engine)
+    for name in names or list(ENTITIES):
+        spec = ENTITIES[name]
+        export_entity(engine, store, spec, touched_by_run(engine, spec, run_id), run_id, mode)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export rows changed by this run")
+    parser.add_argument("entities", nargs="*",
+                        help=f"entities to export: {', '.join(ENTITIES)} (default: all)")
+    parser.add_argument("--mode", choices=EXPORT_MODES, default=EXPORT_MODE)
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.entities) - set(ENTITIES))
+    if unknown:
+        parser.error(f"unknown entities: {', '.join(unknown)}")
+    export_run(args.entities, args.mode)
+    metrics.flush("export")
+
+
+if __name__ == "__main__":
+    main()
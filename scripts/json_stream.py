@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# scripts/json_stream.py
+"""
+Incremental JSON record reader for raw objects.
+
+Reads a binary stream in fixed-size chunks and yields one record at a time,
+so memory is bounded by the chunk size and the largest single record rather
+than by the document. Two layouts are accepted:
+
+  - a top-level JSON array:      [ {...}, {...} ]
+  - NDJSON / concatenated JSON:  {...}\n{...}\n
+
+Empty objects (what Extract lands for a failed fetch) are skipped, matching
+the old ``isinstance(records, list)`` check.
+"""
+
+import os
+import codecs
+import json
+from typing import Any, BinaryIO, Iterator
+
+# ─── CONFIG ───
+CHUNK_SIZE = int(os.getenv("JSON_STREAM_CHUNK", str(64 * 1024)))
+
+_decoder = json.JSONDecoder()
+_WS = " \t\r\n"
+
+
+class _Buffer:
+    """Decoded text window over a byte stream."""
+
+    def __init__(self, stream: BinaryIO, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decode = codecs.getincrementaldecoder("utf-8-sig")().decode
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read another chunk; False once the stream is exhausted."""
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            self.text += self.decode(b"", final=True)
+            return False
+        if self.pos > self.chunk_size:
+            self.text, self.pos = self.text[self.pos:], 0
+        self.text += self.decode(chunk)
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or "" at end of stream."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+
+    def value(self) -> Any:
+        """Decode the JSON value starting at the next non-whitespace character."""
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A value touching the buffer end may be a truncated number/literal
+            if end == len(self.text) and self.fill():
+                continue
+            self.pos = end
+            return obj
+
+
+def iter_json_records(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    buf = _Buffer(stream, chunk_size)
+    first = buf.peek()
+    if first == "[":
+        buf.pos += 1
+        if buf.peek() == "]":
+            return
+        while True:
+            yield buf.value()
+            sep = buf.peek()
+            if sep == "]":
+                return
+            if sep != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {sep!r}")
+            buf.pos += 1
+    elif first == "{":
+        while buf.peek():
+            rec = buf.value()
+            if isinstance(rec, dict) and rec:
+                yield rec
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# scripts/metrics.py
+"""
+Per-stage timings and counters for Extract, transform and load.
+
+Everything is kept in one process-wide registry:
+
+    with stage("transform", entity="drivers"):     # duration + outcome
+        ...
+    inc("records_skipped_total", entity="drivers")
+    observe("http_request_seconds", 0.21, endpoint="drivers", status="200")
+
+Each finished stage is logged as one JSON line (METRICS_LOG, default stderr).
+``flush(job)`` writes the registry as a Prometheus textfile to
+METRICS_TEXTFILE_DIR/<job>.prom (node_exporter's textfile collector format)
+with a ``process="<job>"`` label on every series, so files written by
+concurrent processes never collide. With STATSD_HOST set, every update is
+also sent as a StatsD UDP packet.
+Nothing is exported unless one of those is configured.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# ─── CONFIG ───
+PREFIX        = os.getenv("METRICS_PREFIX", "f1_etl")
+LOG_PATH      = os.getenv("METRICS_LOG", "-")              # "-" = stderr, "" = off
+TEXTFILE_DIR  = os.getenv("METRICS_TEXTFILE_DIR", "")
+STATSD_HOST   = os.getenv("STATSD_HOST", "")
+STATSD_PORT   = int(os.getenv("STATSD_PORT", "8125"))
+
+# Seconds; covers a fast API call up to a slow multipart upload
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "stage_duration_seconds":  "Wall time of the last run of a pipeline stage",
+    "stage_runs_total":        "Pipeline stage runs by outcome",
+    "http_request_seconds":    "OpenF1 request latency",
+    "http_throttled_total":    "OpenF1 responses with status 429",
+    "bytes_total":             "Bytes moved, by source and direction",
+    "rows_upserted_total":     "Rows written to Postgres",
+    "rows_per_second":         "Upsert throughput of the last run",
+    "records_skipped_total":   "Raw records quarantined by validation",
+    "upload_seconds":          "Raw object upload latency per attempt",
+    "upload_failures_total":   "Raw uploads that failed every retry",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Labels], float] = {}
+_gauges: Dict[Tuple[str, Labels], float] = {}
+_histograms: Dict[Tuple[str, Labels], List[float]] = {}   # bucket counts + [sum, count]
+_statsd: Optional[socket.socket] = None
+
+
+def _labels(labels: Dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _number(value: float) -> str:
+    # Exact: "%g" would round byte counters to six significant digits
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# ─── RECORDING ───
+def inc(name: str, value: float = 1, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+    _send(name, value, "c", key[1])
+
+
+def set_gauge(name: str, value: float, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        _gauges[key] = value
+    _send(name, value, "g", key[1])
+
+
+def observe(name: str, seconds: float, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        hist = _histograms.setdefault(key, [0] * len(BUCKETS) + [0.0, 0])
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+        hist[-2] += seconds
+        hist[-1] += 1
+    _send(name, seconds * 1000, "ms", key[1])
+
+
+@contextmanager
+def timed(name: str, **labels) -> Iterator[None]:
+    """Observe the block's wall time in histogram ``name``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+@contextmanager
+def stage(name: str, **labels) -> Iterator[Dict]:
+    """Time a pipeline stage and log it as JSON when it ends.
+
+    The yielded dict is merged into the log line, so callers can attach
+    results (rows, objects) as they learn them.
+    """
+    fields: Dict = {}
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield fields
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        set_gauge("stage_duration_seconds", seconds, stage=name, **labels)
+        inc("stage_runs_total", stage=name, status=status, **labels)
+        log("stage", stage=name, status=status, seconds=round(seconds, 3), **labels, **fields)
+
+
+# ─── JSON LOG ───
+def log(event: str, **fields):
+    if not LOG_PATH:
+        return
+    line = json.dumps({"ts": datetime.now(timezone.utc).isoformat(), "event": event, **fields},
+                      default=str)
+    with _lock:
+        if LOG_PATH == "-":
+            print(line, file=sys.stderr, flush=True)
+        else:
+            with open(LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+# ─── EXPORT ───
+def _send(name: str, value: float, kind: str, labels: Labels):
+    global _statsd
+    if not STATSD_HOST:
+        return
+    # DogStatsD-style tags; plain StatsD servers ignore the suffix
+    tags = "|#" + ",".join(f"{k}:{v}" for k, v in labels) if labels else ""
+    packet = f"{PREFIX}.{name}:{_number(value)}|{kind}{tags}".encode()
+    try:
+        if _statsd is None:
+            _statsd = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        _statsd.sendto(packet, (STATSD_HOST, STATSD_PORT))
+    except OSError:
+        pass  # metrics must never fail the pipeline
+
+
+def _series(name: str, labels: Labels, value: float, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    pairs = tuple((k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    rendered = "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+    return f"{PREFIX}_{name}{rendered} {_number(value)}"
+
+
+def render(process: Optional[str] = None) -> str:
+    """The registry in Prometheus text exposition format."""
+    const: Labels = (("process", process),) if process else ()
+    with _lock:
+        counters, gauges = dict(_counters), dict(_gauges)
+        histograms = {key: list(hist) for key, hist in _histograms.items()}
+
+    lines: List[str] = []
+    for kind, series in (("counter", counters), ("gauge", gauges), ("histogram", histograms)):
+        for name in sorted({name for name, _ in series}):
+            lines.append(f"# HELP {PREFIX}_{name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+            for (metric, labels), value in sorted(series.items()):
+                if metric != name:
+                    continue
+                labels = const + labels
+                if kind != "histogram":
+                    lines.append(_series(name, labels, value))
+                    continue
+                for bound, count in zip(BUCKETS, value):
+                    lines.append(_series(f"{name}_bucket", labels, count, (("le", f"{bound:g}"),)))
+                lines.append(_series(f"{name}_bucket", labels, value[-1], (("le", "+Inf"),)))
+                lines.append(_series(f"{name}_sum", labels, value[-2]))
+                lines.append(_series(f"{name}_count", labels, value[-1]))
+    return "\n".join(lines) + "\n"
+
+
+def flush(job: str):
+    """Write METRICS_TEXTFILE_DIR/<job>.prom atomically (no-op when unset)."""
+    if not TEXTFILE_DIR:
+        return
+    os.makedirs(TEXTFILE_DIR, exist_ok=True)
+    path = os.path.join(TEXTFILE_DIR, f"{job}.prom")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render(job))
+    os.replace(tmp, path)
+
+
+def reset():
+    """Forget every recorded value."""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
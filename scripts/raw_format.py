@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# scripts/raw_format.py
+"""
+Raw-zone serialization shared by Extract.py (writing) and the transforms
+(reading).
+
+RAW_FORMAT picks how Extract lands a payload:
+
+  - json        pretty-printed JSON array, the original layout (default)
+  - ndjson.gz   one record per line, gzip-compressed
+  - ndjson.zst  one record per line, zstd-compressed (needs ``zstandard``)
+
+Readers never need to know which one they got: ``open_decoded`` sniffs the
+gzip/zstd magic bytes and returns a plain byte stream for json_stream.
+"""
+
+import io
+import os
+import gzip
+import json
+from typing import Any, BinaryIO, Iterable
+
+try:
+    import zstandard
+except ImportError:  # optional dependency, only for ndjson.zst
+    zstandard = None
+
+# ─── CONFIG ───
+RAW_FORMAT = os.getenv("RAW_FORMAT", "json")   # json | ndjson.gz | ndjson.zst
+ZSTD_LEVEL = int(os.getenv("RAW_ZSTD_LEVEL", "10"))
+GZIP_LEVEL = int(os.getenv("RAW_GZIP_LEVEL", "6"))
+
+FORMATS = {
+    "json":       {"ext": ".json",       "content_type": "application/json"},
+    "ndjson.gz":  {"ext": ".ndjson.gz",  "content_type": "application/x-ndjson"},
+    "ndjson.zst": {"ext": ".ndjson.zst", "content_type": "application/x-ndjson"},
+}
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def check_format(fmt: str) -> str:
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown RAW_FORMAT {fmt!r}; expected one of {', '.join(FORMATS)}")
+    if fmt == "ndjson.zst" and zstandard is None:
+        raise RuntimeError("RAW_FORMAT=ndjson.zst requires the zstandard package")
+    return fmt
+
+
+def extension(fmt: str = RAW_FORMAT) -> str:
+    return FORMATS[fmt]["ext"]
+
+
+# ─── WRITE ───
+def _write_ndjson(data: Any, out: BinaryIO):
+    records: Iterable = data if isinstance(data, list) else [data]
+    for rec in records:
+        out.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        out.write(b"\n")
+
+
+def encode(data: Any, out: BinaryIO, fmt: str = RAW_FORMAT):
+    """Serialize ``data`` into the binary file ``out`` in format ``fmt``."""
+    if fmt == "json":
+        out.write(json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8"))
+    elif fmt == "ndjson.gz":
+        with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=GZIP_LEVEL, mtime=0) as gz:
+            _write_ndjson(data, gz)
+    elif fmt == "ndjson.zst":
+        check_format(fmt)
+        with zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(out, closefd=False) as zst:
+            _write_ndjson(data, zst)
+    else:
+        check_format(fmt)
+
+
+# ─── READ ───
+class _Prefixed(io.RawIOBase):
+    """Re-attach bytes already read from the front of a stream."""
+
+    def __init__(self, head: bytes, stream: BinaryIO):
+        self.head = head
+        self.stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if self.head:
+            n = min(len(b), len(self.head))
+            b[:n], self.head = self.head[:n], self.head[n:]
+            return n
+        chunk = self.stream.read(len(b))
+        b[:len(chunk)] = chunk
+        return len(chunk)
+
+
+def open_decoded(stream: BinaryIO) -> BinaryIO:
+    """Wrap ``stream`` so it reads decompressed bytes, whatever the raw format."""
+    head = stream.read(4)
+    raw = io.BufferedReader(_Prefixed(head, stream))
+    if head.startswith(_GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    if head.startswith(_ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("Reading zstd raw objects requires the zstandard package")
+        return zstandard.ZstdDecompressor().stream_reader(raw)
+    return raw
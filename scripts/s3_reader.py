@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# scripts/s3_reader.py
+"""
+Prefetching object reader for the prefix-based transforms.
+
+Objects are opened (from a storage.py backend) and parsed on a bounded thread
+pool while the caller consumes earlier results, so S3 latency overlaps with
+the upsert stage. At most PREFETCH_DEPTH objects are in flight or waiting to
+be consumed. The S3 listing helper behind storage.py lives here too.
+"""
+
+import os
+import json
+import queue
+import threading
+from contextlib import closing
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple
+
+# ─── CONFIG ───
+S3_WORKERS     = int(os.getenv("S3_READ_WORKERS", "8"))
+PREFETCH_DEPTH = int(os.getenv("S3_PREFETCH_DEPTH", str(S3_WORKERS * 2)))
+
+_DONE = object()
+
+
+def read_json(blob) -> Any:
+    with closing(blob.body) as body:
+        return json.loads(body.read())
+
+
+def list_objects(s3, bucket: str, prefix: str) -> Iterator[Dict]:
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        yield from page.get("Contents", [])
+
+
+def prefetch_objects(store, keys: Iterable[str],
+                     parse: Callable[[Any], Any] = read_json,
+                     workers: int = S3_WORKERS,
+                     depth: int = PREFETCH_DEPTH) -> Iterator[Tuple[str, Any]]:
+    """Yield ``(key, parse(store.open(key)))`` for every key, in completion order.
+
+    ``keys`` may be lazy (e.g. read off ``Storage.list``); it is consumed on a background
+    thread. Errors from listing or fetching are re-raised in the caller.
+    """
+    results: "queue.Queue" = queue.Queue()
+    slots = threading.Semaphore(depth)
+    stop = threading.Event()
+
+    def fetch(key: str) -> Tuple[str, Any]:
+        return key, parse(store.open(key))
+
+    def produce():
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for key in keys:
+                    while not slots.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    if stop.is_set():
+                        return
+                    pool.submit(fetch, key).add_done_callback(results.put)
+        except Exception as e:
+            failed: Future = Future()
+            failed.set_exception(e)
+            results.put(failed)
+        finally:
+            results.put(_DONE)
+
+    threading.Thread(target=produce, name="s3-prefetch", daemon=True).start()
+    try:
+        while True:
+            item = results.get()
+            if item is _DONE:
+                return
+            slots.release()
+            yield item.result()
+    finally:
+        stop.set()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# scripts/schema.py
+"""
+Versioned schema for the pipeline tables.
+
+``migrate`` creates missing tables from entities.py and then applies every
+numbered migration newer than the one recorded in schema_version, all in
+one transaction under an advisory lock, so concurrent workers never race
+and a failed migration leaves the schema as it was. Migrations are written
+to be no-ops on tables that create_all just made in their final shape.
+
+    1  change columns (updated_at, run_id) and raw_manifest.run_id
+    2  timestamptz / interval instead of strings for dates and GMT offsets,
+       converted in place
+    3  secondary indexes on join keys
+    4  session_results.points (the aggregate tables are simply created)
+    5  change_xid on the entity tables and export_state.exported_snapshot,
+       so deltas follow commit order rather than updated_at
+
+New tables with nothing to convert, like quarantine, need no migration:
+create_all makes them.
+
+With SCHEMA_PARTITION_FACTS=1 (or --partition-facts) the fact tables are
+rebuilt as PARTITION BY RANGE (meeting_key) with one partition per season,
+bounded by that season's meeting keys, and a default partition for keys no
+season covers yet. ``ensure_season_partitions`` splits new seasons out of
+the default partition once their meetings are in, and widens a season's
+partition as later meetings of it arrive; transform.py calls it after every
+meetings run.
+
+    python scripts/schema.py                      # migrate DATABASE_URL
+    python scripts/schema.py --partition-facts    # ... and partition the facts
+    python scripts/schema.py --status
+"""
+
+import os
+import re
+import argparse
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import Table, func, select, text
+from sqlalchemy.schema import CreateTable
+
+from bulk_upsert import CURRENT_XID
+from clients import get_engine
+from entities import (
+    ENTITIES,
+    driver_standings,
+    export_state,
+    metadata,
+    quarantine,
+    raw_manifest,
+    schema_version,
+    session_positions,
+    session_results,
+    starting_grid,
+)
+
+# ─── CONFIG ───
+DATABASE_URL    = os.getenv("DATABASE_URL")
+PARTITION_FACTS = os.getenv("SCHEMA_PARTITION_FACTS", "0") == "1"
+LOCK_KEY        = 0x46315F45   # pg_advisory_xact_lock key shared by every migrator
+
+TABLES      = [spec.table for spec in ENTITIES.values()] + [
+    raw_manifest, export_state, schema_version, session_positions, driver_standings, quarantine,
+]
+FACT_TABLES = [session_results, starting_grid]
+
+# Columns that used to be strings: table -> {column: native type}
+NATIVE_TYPES: Dict[str, Dict[str, str]] = {
+    "meetings": {"date_start": "timestamptz", "gmt_offset": "interval"},
+    "sessions": {"date_start": "timestamptz", "date_end": "timestamptz",
+                 "gmt_offset": "interval"},
+}
+
+
+def lock(conn):
+    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": LOCK_KEY})
+
+
+def column_types(conn, table: str) -> Dict[str, str]:
+    return dict(conn.execute(text(
+        "SELECT column_name, data_type FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = :table"
+    ), {"table": table}).all())
+
+
+# ─── MIGRATIONS ───
+def add_change_columns(conn):
+    for spec in ENTITIES.values():
+        conn.exec_driver_sql(
+            f"ALTER TABLE {spec.table.name} "
+            f"ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now(), "
+            f"ADD COLUMN IF NOT EXISTS run_id varchar"
+        )
+        conn.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS ix_{spec.table.name}_updated_at "
+            f"ON {spec.table.name} (updated_at)"
+        )
+    conn.exec_driver_sql("ALTER TABLE raw_manifest ADD COLUMN IF NOT EXISTS run_id varchar")
+
+
+def use_native_types(conn):
+    for table, columns in NATIVE_TYPES.items():
+        current = column_types(conn, table)
+        changes = [
+            # Empty strings become NULL rather than failing the cast
+            f"ALTER COLUMN {col} TYPE {sql_type} USING NULLIF({col}, '')::{sql_type}"
+            for col, sql_type in columns.items()
+            if current.get(col) in ("character varying", "text")
+        ]
+        if changes:
+            # One ALTER, so the table is rewritten once
+            conn.exec_driver_sql(f"ALTER TABLE {table} " + ", ".join(changes))
+
+
+def add_join_indexes(conn):
+    for spec in ENTITIES.values():
+        for index in spec.table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def add_points(conn):
+    conn.exec_driver_sql("ALTER TABLE session_results "
+                         "ADD COLUMN IF NOT EXISTS points double precision")
+
+
+def add_change_xid(conn):
+    for spec in ENTITIES.values():
+        name = spec.table.name
+        # Added without the default first, so existing rows stay NULL instead of
+        # all being stamped (and re-exported) with this transaction's id
+        conn.exec_driver_sql(f"ALTER TABLE {name} ADD COLUMN IF NOT EXISTS change_xid bigint")
+        conn.exec_driver_sql(f"ALTER TABLE {name} ALTER COLUMN change_xid "
+                             f"SET DEFAULT {CURRENT_XID}")
+        conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_{name}_change_xid "
+                             f"ON {name} (change_xid)")
+    conn.exec_driver_sql("ALTER TABLE export_state "
+                         "ADD COLUMN IF NOT EXISTS exported_snapshot varchar")
+
+
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "change columns and raw_manifest.run_id", add_change_columns),
+    (2, "timestamptz/interval dates and GMT offsets", use_native_types),
+    (3, "secondary indexes on join keys", add_join_indexes),
+    (4, "session_results.points", add_points),
+    (5, "change_xid and export_state.exported_snapshot", add_change_xid),
+]
+
+
+def current_version(conn) -> int:
+    return conn.execute(select(func.coalesce(func.max(schema_version.c.version), 0))).scalar()
+
+
+# ─── PARTITIONING ───
+def is_partitioned(conn, table: Table) -> bool:
+    return bool(conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table AND c.relnamespace = current_schema()::regnamespace"
+    ), {"table": table.name}).scalar())
+
+
+def partition_table(conn, table: Table):
+    """Rebuild ``table`` as PARTITION BY RANGE (meeting_key), keeping its rows."""
+    if is_partitioned(conn, table):
+        return
+    name, old = table.name, f"{table.name}_unpartitioned"
+    conn.exec_driver_sql(f"ALTER TABLE {name} RENAME TO {old}")
+    # Index names are schema-wide; move the old ones out of the way
+    for (index,) in conn.execute(text("SELECT indexname FROM pg_indexes "
+                                      "WHERE schemaname = current_schema() AND tablename = :t"),
+                                 {"t": old}).all():
+        conn.exec_driver_sql(f"ALTER INDEX {index} RENAME TO {index[:48]}_unpartitioned")
+
+    create = str(CreateTable(table).compile(dialect=conn.dialect)).rstrip()
+    conn.exec_driver_sql(f"{create} PARTITION BY RANGE (meeting_key)")
+    for index in table.indexes:
+        index.create(conn)
+    conn.exec_driver_sql(f"CREATE TABLE {name}_default PARTITION OF {name} DEFAULT")
+
+    columns = ", ".join(c.name for c in table.columns)
+    conn.exec_driver_sql(f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {old}")
+    conn.exec_driver_sql(f"DROP TABLE {old}")
+    print(f"🧱 Partitioned {name} by season")
+
+
+def season_bounds(conn) -> List[Tuple[int, int, int]]:
+    """(season, first meeting_key, last meeting_key + 1) per season in meetings."""
+    return conn.execute(text(
+        "SELECT year, min(meeting_key), max(meeting_key) + 1 FROM meetings "
+        "WHERE year IS NOT NULL GROUP BY year ORDER BY year"
+    )).all()
+
+
+def partition_bounds(conn, table: Table) -> Dict[str, Tuple[int, int]]:
+    """Range partitions of ``table`` -> their (low, high) meeting_key bounds."""
+    rows = conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = CAST(:t AS regclass)"
+    ), {"t": table.name}).all()
+    bounds = {}
+    for part, bound in rows:
+        found = re.fullmatch(r"FOR VALUES FROM \((-?\d+)\) TO \((-?\d+)\)", bound)
+        if found:   # the default partition has no range
+            bounds[part] = (int(found.group(1)), int(found.group(2)))
+    return bounds
+
+
+def ensure_season_partitions_in(conn):
+    for table in FACT_TABLES:
+        if not is_partitioned(conn, table):
+            continue
+        name = table.name
+        existing = partition_bounds(conn, table)
+        for season, low, high in season_bounds(conn):
+            part = f"{name}_{season}"
+            if part in existing:
+                old_low, old_high = existing[part]
+                low, high = min(low, old_low), max(high, old_high)
+                if (low, high) == (old_low, old_high):
+                    continue
+                # Bounds cannot be altered in place: detach, refill, reattach wider
+                conn.exec_driver_sql(f"ALTER TABLE {name} DETACH PARTITION {part}")
+            else:
+                conn.exec_driver_sql(f"CREATE TABLE {part} (LIKE {name} INCLUDING DEFAULTS)")
+            # Rows that arrived before the season's partition covered them move out
+            # of the default
+            conn.exec_driver_sql(
+                f"WITH moved AS (DELETE FROM {name}_default "
+                f"WHERE meeting_key >= {int(low)} AND meeting_key < {int(high)} RETURNING *) "
+                f"INSERT INTO {part} SELECT * FROM moved"
+            )
+            conn.exec_driver_sql(f"ALTER TABLE {name} ATTACH PARTITION {part} "
+                                 f"FOR VALUES FROM ({int(low)}) TO ({int(high)})")
+            action = "Widened" if part in existing else "Added"
+            print(f"🧱 {action} partition {part} for meeting keys {low}–{high - 1}")
+
+
+def ensure_season_partitions(engine):
+    """Give every season in meetings its own partition of each partitioned fact table."""
+    with engine.begin() as conn:
+        lock(conn)
+        ensure_season_partitions_in(conn)
+
+
+# ─── ENTRY POINTS ───
+def migrate(engine, partition_facts: bool = PARTITION_FACTS) -> int:
+    """Bring the schema up to date; returns the resulting version."""
+    with engine.begin() as conn:
+        lock(conn)
+        metadata.create_all(conn, tables=TABLES)
+        version = current_version(conn)
+        for number, description, apply in MIGRATIONS:
+            if number <= version:
+                continue
+            apply(conn)
+            conn.execute(schema_version.insert().values(version=number, description=description))
+            print(f"🛠️  Schema migrated to v{number}: {description}")
+            version = number
+        if partition_facts:
+            for table in FACT_TABLES:
+                partition_table(conn, table)
+            ensure_season_partitions_in(conn)
+    return version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create or migrate the pipeline schema")
+    parser.add_argument("--partition-facts", action="store_true", default=PARTITION_FACTS,
+                        help="partition session_results and starting_grid by season")
+    parser.add_argument("--status", action="store_true",
+                        help="print the applied migrations and change nothing")
+    args = parser.parse_args(argv)
+
+    engine = get_engine(DATABASE_URL)
+    if args.status:
+        with engine.connect() as conn:
+            rows = (conn.execute(select(schema_version).order_by(schema_version.c.version)).all()
+                    if engine.dialect.has_table(conn, schema_version.name) else [])
+            for row in rows:
+                print(f"v{row.version}  {row.applied_at:%Y-%m-%d %H:%M}  {row.description}")
+            for table in FACT_TABLES:
+                if engine.dialect.has_table(conn, table.name):
+                    layout = "partitioned" if is_partitioned(conn, table) else "plain"
+                    print(f"{table.name}: {layout}")
+        return
+    version = migrate(engine, args.partition_facts)
+    print(f"✅ Schema at v{version}")
+
+
+if __name__ == "__main__":
+    main()
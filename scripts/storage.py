@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# scripts/storage.py
+"""
+Object storage behind the raw and processed zones.
+
+  - s3        the zone's bucket (RAW_BUCKET / PROCESSED_BUCKET)
+  - local     a directory tree (local_data/raw, local_data/processed); reads
+              are memory-mapped, so nothing is copied until it is parsed
+  - memory    a process-wide dict per bucket, for tests and in-process runs
+  - local+s3  written to S3 and then to a local copy; listed from S3, so
+              objects landed by other workers are never missed, but read from
+              the local copy when there is one. A copy only exists once its S3
+              upload succeeded, so it can stand in for a HEAD request
+
+RAW_STORAGE picks the raw zone's backend (default local+s3, or s3 with
+RAW_KEEP_LOCAL=0): when Extract and the transforms share local_data they skip
+the S3 download, and RAW_STORAGE=local runs the pipeline without S3 at all.
+PROCESSED_STORAGE is where export.py publishes what it wrote under
+local_data/processed (default s3; local leaves it there).
+
+Keys are "/"-separated and ``list`` yields S3-style {"Key", "ETag", "Size"}
+entries on every backend. Local ETags come from the file's size and mtime, so
+listing never reads the data. Bytes read and written are recorded per backend
+in metrics.py.
+"""
+
+import io
+import os
+import mmap
+import shutil
+import hashlib
+import threading
+from typing import BinaryIO, Dict, Iterator, NamedTuple, Optional
+
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
+import metrics
+from clients import get_s3
+from s3_reader import list_objects
+
+# ─── CONFIG ───
+RAW_STORAGE       = os.getenv("RAW_STORAGE",
+                              "local+s3" if os.getenv("RAW_KEEP_LOCAL", "1") == "1" else "s3")
+PROCESSED_STORAGE = os.getenv("PROCESSED_STORAGE", "s3")
+BACKENDS          = ("s3", "local", "memory", "local+s3")
+
+
+class Blob(NamedTuple):
+    body: BinaryIO   # close it when done
+    size: int
+    source: str      # backend that served it
+
+
+class MappedFile(io.RawIOBase):
+    """A read-only memory map of a file with the usual file interface."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.size = os.fstat(f.fileno()).st_size
+            # Empty files cannot be mapped
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self._view = memoryview(self._map if self._map is not None else b"")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = max(0, min(len(b), self.size - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def readall(self) -> bytes:
+        data = self._view[self._pos:].tobytes()
+        self._pos = self.size
+        return data
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self.size}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+            if self._map is not None:
+                self._map.close()
+        super().close()
+
+
+# ─── BACKENDS ───
+class Storage:
+    name = ""
+    local = False   # exists() and open() need no network round trip
+
+    def list(self, prefix: str) -> Iterator[Dict]:
+        raise NotImplementedError
+
+    def open(self, key: str) -> Blob:
+        raise NotImplementedError
+
+    def put(self, key: str, body: BinaryIO, size: int, content_type: Optional[str] = None):
+        """Store ``size`` bytes read from ``body`` (positioned at the start) under ``key``."""
+        raise NotImplementedError
+
+    def put_file(self, key: str, path: str, content_type: Optional[str] = None):
+        with open(path, "rb") as f:
+            self.put(key, f, os.path.getsize(path), content_type)
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        raise NotImplementedError
+
+
+class S3Storage(Storage):
+    name = "s3"
+
+    def __init__(self, bucket: str, pool: int = 10, transfer: Optional[TransferConfig] = None):
+        self.bucket = bucket
+        self.pool = pool
+        self.transfer = transfer
+
+    @property
+    def client(self):
+        return get_s3(max_pool_connections=self.pool)
+
+    def list(self, prefix: str) -> Iterator[Dict]:
+        for obj in list_objects(self.client, self.bucket, prefix):
+            yield {"Key": obj["Key"], "ETag": obj["ETag"], "Size": obj["Size"]}
+
+    def open(self, key: str) -> Blob:
+        resp = self.client.get_object(Bucket=self.bucket, Key=key)
+        metrics.inc("bytes_total", resp["ContentLength"], source=self.name, direction="in")
+        return Blob(resp["Body"], resp["ContentLength"], self.name)
+
+    def put(self, key: str, body: BinaryIO, size: int, content_type: Optional[str] = None):
+        extra = {"ContentType": content_type} if content_type else None
+        self.client.upload_fileobj(body, self.bucket, key, ExtraArgs=extra, Config=self.transfer)
+        metrics.inc("bytes_total", size, source=self.name, direction="out")
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def url(self, key: str) -> str:
+        return f"s3://{self.bucket}/{key}"
+
+
+class LocalStorage(Storage):
+    name = "local"
+    local = True
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def list(self, prefix: str) -> Iterator[Dict]:
+        # Only walk the directory the prefix points into
+        top = self.path(prefix.rsplit("/", 1)[0]) if "/" in prefix else self.root
+        found = []
+        for dirpath, _, files in os.walk(top):
+            for name in files:
+                path = os.path.join(dirpath, name)
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                if key.startswith(prefix) and not name.endswith(".tmp"):
+                    found.append((key, path))
+        for key, path in sorted(found):   # S3 lists in key order
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield {"Key": key, "ETag": f'"{st.st_size:x}-{st.st_mtime_ns:x}"', "Size": st.st_size}
+
+    def open(self, key: str) -> Blob:
+        body = MappedFile(self.path(key))
+        metrics.inc("bytes_total", body.size, source=self.name, direction="in")
+        return Blob(body, body.size, self.name)
+
+    def stage(self, key: str, body: BinaryIO) -> str:
+        """Write ``body`` next to ``key``'s file; returns the temp path to move into place."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            shutil.copyfileobj(body, f)
+        return tmp
+
+    def put(self, key: str, body: BinaryIO, size: int, content_type: Optional[str] = None):
+        # Readers never see a partial file
+        os.replace(self.stage(key, body), self.path(key))
+        metrics.inc("bytes_total", size, source=self.name, direction="out")
+
+    def put_file(self, key: str, path: str, content_type: Optional[str] = None):
+        if os.path.abspath(path) != os.path.abspath(self.path(key)):
+            super().put_file(key, path, content_type)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def url(self, key: str) -> str:
+        return self.path(key)
+
+
+class MemoryStorage(Storage):
+    name = "memory"
+    local = True
+
+    def __init__(self, bucket: str = ""):
+        self.bucket = bucket
+        self.objects: Dict[str, bytes] = {}
+        self.lock = threading.Lock()
+
+    def list(self, prefix: str) -> Iterator[Dict]:
+        with self.lock:
+            objects = sorted((k, v) for k, v in self.objects.items() if k.startswith(prefix))
+        for key, data in objects:
+            yield {"Key": key, "ETag": f'"{hashlib.md5(data).hexdigest()}"', "Size": len(data)}
+
+    def open(self, key: str) -> Blob:
+        with self.lock:
+            if key not in self.objects:
+                raise FileNotFoundError(self.url(key))
+            data = self.objects[key]
+        metrics.inc("bytes_total", len(data), source=self.name, direction="in")
+        return Blob(io.BytesIO(data), len(data), self.name)
+
+    def put(self, key: str, body: BinaryIO, size: int, content_type: Optional[str] = None):
+        data = body.read()
+        with self.lock:
+            self.objects[key] = data
+        metrics.inc("bytes_total", len(data), source=self.name, direction="out")
+
+    def exists(self, key: str) -> bool:
+        with self.lock:
+            return key in self.objects
+
+    def url(self, key: str) -> str:
+        return f"memory://{self.bucket}/{key}"
+
+
+class MirroredStorage(Storage):
+    """Writes go to S3 and then the local copy; reads prefer the local copy."""
+
+    name = "local+s3"
+    local = True
+
+    def __init__(self, local: LocalStorage, remote: S3Storage):
+        self.copy = local
+        self.remote = remote
+
+    def list(self, prefix: str) -> Iterator[Dict]:
+        return self.remote.list(prefix)
+
+    def open(self, key: str) -> Blob:
+        if self.copy.exists(key):
+            return self.copy.open(key)
+        return self.remote.open(key)
+
+    def put(self, key: str, body: BinaryIO, size: int, content_type: Optional[str] = None):
+        # The copy is uploaded from a temp file and only moved into place once S3
+        # has it: a failed upload must leave no copy that would pass for landed
+        tmp = self.copy.stage(key, body)
+        try:
+            self.remote.put_file(key, tmp, content_type)
+            os.replace(tmp, self.copy.path(key))
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        metrics.inc("bytes_total", size, source=self.copy.name, direction="out")
+
+    def put_file(self, key: str, path: str, content_type: Optional[str] = None):
+        self.remote.put_file(key, path, content_type)
+        self.copy.put_file(key, path, content_type)
+
+    def exists(self, key: str) -> bool:
+        # The local copy is written after the upload; checking S3 would cost a
+        # request per key
+        return self.copy.exists(key)
+
+    def url(self, key: str) -> str:
+        return self.remote.url(key)
+
+
+# ─── FACTORY ───
+_stores: Dict[tuple, Storage] = {}
+_lock = threading.Lock()
+
+
+def check_backend(backend: str) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage {backend!r}; expected one of {', '.join(BACKENDS)}")
+    return backend
+
+
+def open_storage(backend: str, bucket: str, root: str, pool: int = 10,
+                 transfer: Optional[TransferConfig] = None) -> Storage:
+    """The process-wide store for ``bucket`` (s3) or ``root`` (local)."""
+    key = (check_backend(backend), bucket, root, pool)
+    with _lock:
+        if key not in _stores:
+            if backend == "s3":
+                store = S3Storage(bucket, pool, transfer)
+            elif backend == "local":
+                store = LocalStorage(root)
+            elif backend == "memory":
+                # Shared by every caller naming the bucket, whatever the pool
+                store = next((s for s in _stores.values()
+                              if isinstance(s, MemoryStorage) and s.bucket == bucket), None)
+                store = store or MemoryStorage(bucket)
+            else:
+                store = MirroredStorage(LocalStorage(root), S3Storage(bucket, pool, transfer))
+            _stores[key] = store
+        return _stores[key]
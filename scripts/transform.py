@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# scripts/transform.py
+"""
+Runs the raw -> Postgres -> processed transform for any subset of entities
+in one process, over one raw store and one pooled SQLAlchemy engine.
+
+    python scripts/transform.py                       # every entity
+    python scripts/transform.py drivers sessions      # a subset
+    python scripts/transform.py --parallel            # entities concurrently
+    python scripts/transform.py --full-refresh        # ignore raw_manifest
+    python scripts/transform.py --meeting 1254        # one meeting's raw objects
+    python scripts/transform.py meetings --season 2024  # one season's meetings
+
+Entity schemas and raw locations are declared in entities.py. ``run`` is
+importable (the DAG calls it from @task callables); clients come from
+clients.py and the schema is migrated (schema.py) once per process. Raw
+objects are read through RAW_STORAGE (storage.py), so with the default
+local+s3 the copies Extract left in local_data/raw are read instead of being
+downloaded again. An object is only recorded in raw_manifest once the export
+of its rows was published, so a partition that failed to upload is rewritten
+by the next run.
+
+Records are validated in batches of TRANSFORM_BATCH_SIZE: with pyarrow each
+batch becomes an Arrow table of just the entity's columns, rows missing a
+required column are masked out, and the rejects go to the quarantine table
+in one write per entity. Per-entity timings, rows, quarantined records and
+bytes read are recorded in metrics.py.
+"""
+
+import io
+import os
+import argparse
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, select
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # optional; records are then validated one by one
+    pa = pc = None
+
+import metrics
+from bulk_upsert import write_rows
+from clients import get_engine, once
+from entities import ENTITIES, EntitySpec, quarantine, raw_manifest
+from export import EXPORT_MODE, EXPORT_MODES, export_entity, processed_storage
+from json_stream import iter_json_records
+from raw_format import open_decoded
+from s3_reader import S3_WORKERS, prefetch_objects
+from schema import ensure_season_partitions, migrate
+from storage import RAW_STORAGE, Blob, Storage, open_storage
+
+# ─── CONFIG ───
+RAW_BUCKET       = os.getenv("RAW_BUCKET", "etl-f1-data")
+RAW_ROOT         = os.path.join("local_data", "raw")
+DATABASE_URL     = os.getenv("DATABASE_URL")
+MAX_WORKERS      = int(os.getenv("TRANSFORM_WORKERS", str(len(ENTITIES))))
+STREAM_THRESHOLD = int(os.getenv("STREAM_THRESHOLD_BYTES", str(1024 * 1024)))
+BATCH_SIZE       = int(os.getenv("TRANSFORM_BATCH_SIZE", "5000"))
+COLUMNAR         = pa is not None and os.getenv("TRANSFORM_COLUMNAR", "1") == "1"
+# Stamped on every row this run inserts or changes (Airflow passes its run_id)
+RUN_ID           = os.getenv("RUN_ID") or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+# ─── CLIENTS ───
+def raw_storage() -> Storage:
+    # Every entity may prefetch with S3_WORKERS threads at once
+    return open_storage(RAW_STORAGE, bucket=RAW_BUCKET, root=RAW_ROOT,
+                        pool=S3_WORKERS * MAX_WORKERS)
+
+
+def make_engine():
+    return get_engine(DATABASE_URL, pool_size=MAX_WORKERS)
+
+
+def prepare_schema(engine):
+    """Create and migrate the schema; runs once per process and engine."""
+    once(("schema", engine.url), lambda: migrate(engine))
+
+
+# ─── EXTRACT RAW ───
+def stream_records(blob: Blob) -> Iterator[Dict]:
+    """Records decoded lazily from ``blob``; its body (an S3 connection or a
+    memory map) is closed once exhausted, on error, or when abandoned."""
+    with closing(blob.body) as body:
+        yield from iter_json_records(open_decoded(body))
+
+
+def read_records(blob: Blob) -> Iterable[Dict]:
+    """Parse small objects on the prefetch thread; stream large ones lazily.
+
+    Objects above STREAM_THRESHOLD are decoded straight from the S3 body or
+    memory map as the upsert stage consumes them, so memory stays flat however
+    big the file gets. JSON and gzip/zstd NDJSON raw objects are both accepted.
+    """
+    if blob.size > STREAM_THRESHOLD:
+        return stream_records(blob)
+    with closing(blob.body) as body:
+        return list(iter_json_records(open_decoded(io.BytesIO(body.read()))))
+
+
+def raw_scope(spec: EntitySpec, meeting_key: Optional[int] = None,
+              season: Optional[int] = None) -> Optional[int]:
+    """What the spec's raw keys are named by: a meeting_key, or a season."""
+    return meeting_key if spec.per_meeting else season
+
+
+def raw_prefix(spec: EntitySpec, meeting_key: Optional[int] = None,
+               season: Optional[int] = None) -> str:
+    scope = raw_scope(spec, meeting_key, season)
+    return spec.raw_prefix if scope is None else f"{spec.raw_prefix}{scope}"
+
+
+def raw_objects(store: Storage, spec: EntitySpec, meeting_key: Optional[int] = None,
+                season: Optional[int] = None) -> Iterator[Dict]:
+    """Raw objects of the entity, or only those of one meeting or season."""
+    prefix = raw_prefix(spec, meeting_key, season)
+    scoped = raw_scope(spec, meeting_key, season) is not None
+    for obj in store.list(prefix):
+        # drivers/1254.json or sessions/1254_sessions.json, but not 12540_…
+        if not scoped or obj["Key"][len(prefix):][:1] in ("_", "."):
+            yield obj
+
+
+def changed_objects(conn, store: Storage, spec: EntitySpec, full_refresh: bool = False,
+                    meeting_key: Optional[int] = None,
+                    season: Optional[int] = None) -> Dict[str, str]:
+    """Raw objects under the spec's prefix whose ETag is not in raw_manifest."""
+    objects = raw_objects(store, spec, meeting_key, season)
+    if full_refresh:
+        return {obj["Key"]: obj["ETag"] for obj in objects}
+    seen = dict(conn.execute(
+        select(raw_manifest.c.key, raw_manifest.c.etag)
+        .where(raw_manifest.c.key.startswith(raw_prefix(spec, meeting_key, season)))
+    ).all())
+    return {obj["Key"]: obj["ETag"] for obj in objects if seen.get(obj["Key"]) != obj["ETag"]}
+
+
+def iter_raw_batches(store: Storage, keys: Iterable[str],
+                     done: List[str] = None) -> Iterator[Tuple[str, List[Dict]]]:
+    """(key, up to BATCH_SIZE records) from every key; each key is appended
+    to ``done`` once fully read."""
+    for key, records in prefetch_objects(store, keys, parse=read_records):
+        records = iter(records)
+        try:
+            while True:
+                batch = list(islice(records, BATCH_SIZE))
+                if not batch:
+                    break
+                yield key, batch
+        finally:
+            if hasattr(records, "close"):   # a streamed object: release its body now
+                records.close()
+        if done is not None:
+            done.append(key)
+
+
+# ─── VALIDATE ───
+Batch = Tuple[List[Dict], List[Dict], Set]   # valid rows, rejected rows, partition values
+
+
+def raw_schema(spec: EntitySpec):
+    """Arrow schema of the raw fields the spec reads; dates stay ISO strings."""
+    types = {int: pa.int64(), float: pa.float64(), bool: pa.bool_()}
+    return pa.schema([
+        (raw, types.get(spec.table.c[col].type.python_type, pa.string()))
+        for col, raw in zip(spec.fields, spec.raw_fields)
+    ])
+
+
+def columnar_batch(spec: EntitySpec, records: List[Dict], run_id: str) -> Optional[Batch]:
+    """Project and validate ``records`` as one Arrow table; None if they do not
+    fit the raw schema (e.g. a string where a number belongs)."""
+    try:
+        table = pa.Table.from_pylist(records, schema=raw_schema(spec))
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+    table = table.rename_columns(list(spec.fields))
+    valid = pc.is_valid(table[spec.required_columns[0]])
+    for col in spec.required_columns[1:]:
+        valid = pc.and_(valid, pc.is_valid(table[col]))
+    rows, rejected = table.filter(valid), table.filter(pc.invert(valid))
+    parts = set(pc.unique(rows[spec.partition_by]).to_pylist())
+    rows = rows.append_column("run_id", pa.array([run_id] * rows.num_rows, pa.string()))
+    return rows.to_pylist(), rejected.to_pylist(), parts
+
+
+def python_batch(spec: EntitySpec, records: List[Dict], run_id: str) -> Batch:
+    rows, rejected = [], []
+    for rec in records:
+        row = spec.project(rec)
+        if spec.missing(row):
+            rejected.append(row)
+            continue
+        row["run_id"] = run_id
+        rows.append(row)
+    return rows, rejected, {row[spec.partition_by] for row in rows}
+
+
+def valid_rows(spec: EntitySpec, batches: Iterable[Tuple[str, List[Dict]]],
+               touched: Set, rejects: List[Dict], run_id: str = RUN_ID) -> Iterator[Dict]:
+    """Validated rows; their partition values are collected into ``touched``
+    and the rejected ones, as quarantine rows, into ``rejects``."""
+    for key, records in batches:
+        rows, rejected, parts = ((COLUMNAR and columnar_batch(spec, records, run_id))
+                                 or python_batch(spec, records, run_id))
+        touched |= parts
+        rejects += [{"entity": spec.name, "raw_key": key, "run_id": run_id, "record": row,
+                     "reason": "missing " + ", ".join(spec.missing(row))}
+                    for row in rejected]
+        yield from rows
+
+
+def write_quarantine(conn, spec: EntitySpec, keys: List[str], rejects: List[Dict]) -> int:
+    """Replace the quarantined records of the raw objects just read, in one write."""
+    conn.execute(delete(quarantine).where(quarantine.c.entity == spec.name,
+                                          quarantine.c.raw_key.in_(keys)))
+    if rejects:
+        conn.execute(quarantine.insert(), rejects)
+        metrics.inc("records_skipped_total", len(rejects), entity=spec.name)
+        print(f"⚠️  Quarantined {len(rejects)} malformed {spec.name} records")
+    return len(rejects)
+
+
+# ─── RUNNER ───
+def transform_entity(engine, store: Storage, spec: EntitySpec, full_refresh: bool = False,
+                     meeting_key: Optional[int] = None, export_mode: str = EXPORT_MODE,
+                     run_id: str = RUN_ID, season: Optional[int] = None):
+    touched: Set = set()
+    rejects: List[Dict] = []
+    done: List[str] = []
+    manifest: List[Dict] = []
+    with metrics.stage("transform", entity=spec.name) as st, engine.begin() as conn:
+        if not spec.incremental:
+            keys = (obj["Key"] for obj in raw_objects(store, spec, meeting_key, season))
+            stats = write_rows(conn, spec.table,
+                               valid_rows(spec, iter_raw_batches(store, keys, done),
+                                          touched, rejects, run_id),
+                               spec.key_columns)
+        else:
+            changed = changed_objects(conn, store, spec, full_refresh, meeting_key, season)
+            print(f"🔎 {len(changed)} changed {spec.name} objects under "
+                  f"{raw_prefix(spec, meeting_key, season)}")
+            stats = write_rows(conn, spec.table,
+                               valid_rows(spec, iter_raw_batches(store, changed, done),
+                                          touched, rejects, run_id),
+                               spec.key_columns)
+            now = datetime.now(timezone.utc)
+            manifest = [{"key": key, "etag": changed[key], "processed_at": now, "run_id": run_id}
+                        for key in done]
+            st["objects"] = len(done)
+        st["rows"] = stats.rows
+        st["quarantined"] = write_quarantine(conn, spec, done, rejects)
+
+    metrics.inc("rows_upserted_total", stats.rows, entity=spec.name, target="transform")
+    metrics.set_gauge("rows_per_second", stats.rows_per_sec, entity=spec.name, target="transform")
+    print(f"✅ Upserted {stats.rows} {spec.name} rows into Postgres "
+          f"({stats.rows_per_sec:,.0f} rows/s)")
+    export_entity(engine, processed_storage(), spec, touched, run_id, export_mode)
+    if manifest:
+        # Only once the export is published (it raises otherwise): until then the
+        # objects count as changed, so the next run reads them and re-exports
+        # their partitions
+        with engine.begin() as conn:
+            write_rows(conn, raw_manifest, manifest, ["key"],
+                       # run_id is a change column, so it has to be named to be updated
+                       update_columns=["etag", "processed_at", "run_id"])
+
+
+def run(names: Sequence[str], parallel: bool = False, full_refresh: bool = False,
+        meeting_key: Optional[int] = None, export_mode: str = EXPORT_MODE,
+        run_id: str = RUN_ID, season: Optional[int] = None):
+    specs: List[EntitySpec] = [ENTITIES[name] for name in names]
+    store = raw_storage()
+    engine = make_engine()
+    prepare_schema(engine)
+
+    options = dict(full_refresh=full_refresh, meeting_key=meeting_key,
+                   export_mode=export_mode, run_id=run_id, season=season)
+    if parallel and len(specs) > 1:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            futures = [pool.submit(transform_entity, engine, store, spec, **options)
+                       for spec in specs]
+            for future in futures:
+                future.result()
+    else:
+        for spec in specs:
+            transform_entity(engine, store, spec, **options)
+
+    if any(not spec.per_meeting for spec in specs):
+        # New seasons' meetings decide the fact tables' partition bounds
+        ensure_season_partitions(engine)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transform raw OpenF1 data into Postgres")
+    parser.add_argument("entities", nargs="*",
+                        help=f"entities to transform: {', '.join(ENTITIES)} (default: all)")
+    parser.add_argument("--parallel", action="store_true",
+                        help="transform the selected entities concurrently")
+    parser.add_argument("--full-refresh", action="store_true",
+                        help="reprocess every raw object, even if unchanged since the last run")
+    scope = parser.add_mutually_exclusive_group()
+    scope.add_argument("--meeting", type=int, metavar="MEETING_KEY",
+                       help="only transform raw objects of this meeting")
+    scope.add_argument("--season", type=int, metavar="YEAR",
+                       help="only transform this season's raw objects of season-wide entities")
+    parser.add_argument("--export", choices=EXPORT_MODES, default=EXPORT_MODE,
+                        help=f"processed-zone export after the upsert (default: {EXPORT_MODE})")
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.entities) - set(ENTITIES))
+    if unknown:
+        parser.error(f"unknown entities: {', '.join(unknown)}")
+
+    names = args.entities or [
+        name for name, spec in ENTITIES.items()
+        if (args.meeting is None or spec.per_meeting)
+        and (args.season is None or not spec.per_meeting)
+    ]
+    if args.meeting is not None:
+        season_wide = [name for name in names if not ENTITIES[name].per_meeting]
+        if season_wide:
+            parser.error(f"--meeting does not apply to {', '.join(season_wide)}")
+    if args.season is not None:
+        per_meeting = [name for name in names if ENTITIES[name].per_meeting]
+        if per_meeting:
+            parser.error(f"--season does not apply to {', '.join(per_meeting)}")
+    scope = (f" for meeting {args.meeting}" if args.meeting is not None
+             else f" for season {args.season}" if args.season is not None else "")
+    print(f"🔄 Transforming {', '.join(names)}{scope} (run {RUN_ID})…")
+    run(names, parallel=args.parallel, full_refresh=args.full_refresh,
+        meeting_key=args.meeting, export_mode=args.export, season=args.season)
+    metrics.flush("transform")
+
+
+if __name__ == "__main__":
+    main()